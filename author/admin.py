@@ -1,64 +1,166 @@
 from django.contrib import admin
-from django.core.mail import send_mail
-from django.conf import settings
-from .models import Notification
-import logging
+from django.db import transaction
+from .changelist import EstimatedCountPaginator, NotificationChangeList
+from .models import ArchiveCheckpoint, EmailOutbox, Notification, NotificationArchive
+from .outbox import enqueue_email, enqueue_emails
+from .search import InvalidSearch, filter_tokens
+from .transitions import allowed_sources, apply_transition
+
+class VerifiedListFilter(admin.BooleanFieldListFilter):
+    """
+    The is_verified filter, through ``NotificationQuerySet.verified`` so it uses an index.
+    """
+
+    def queryset(self, request, queryset):
+        if self.lookup_val is None:
+            return super().queryset(request, queryset)
+        return queryset.verified(self.lookup_val in ('1', 'True', 'true'))
 
-logger = logging.getLogger(__name__)
 
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'status', 'is_verified', 'scheduled_date', 'created_at']
-    list_filter = ['status', 'is_verified']
+    list_filter = ['status', ('is_verified', VerifiedListFilter)]
+    # Newest first, served by the (status|is_verified, created_at, id) indexes
+    ordering = ['-created_at', '-id']
+    date_hierarchy = 'scheduled_date'
+    # Estimated counts, capped page numbers and cursors for deeper pages, see author/changelist.py
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    # Searched through the full-text index, see get_search_results()
     search_fields = ['name', 'email']
 
-    def send_approval_email(self, notification):
+    actions = ['accept_selected', 'reject_selected']
+
+    def get_changelist(self, request, **kwargs):
+        return NotificationChangeList
+
+    def get_search_results(self, request, queryset, search_term):
         """
-        Sends an approval email to the user when the notification is approved.
+        Matches every word of the search term against the words of the name and email
+        with the full-text backend of author.search, instead of an ``icontains`` scan.
         """
+        if not search_term.strip():
+            return queryset, False
         try:
-            send_mail(
-                'Notification Approved',
-                f'Hi {notification.name},\n\nYour notification has been approved for the scheduled time: {notification.scheduled_date}.\n\nThank you!',
-                settings.DEFAULT_FROM_EMAIL,
-                [notification.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            logger.error(f"Failed to send approval email for notification ID {notification.id}: {e}")
+            return filter_tokens(queryset, search_term), False
+        except InvalidSearch:
+            return queryset.none(), False
+
+    def approval_message(self, notification):
+        return (
+            'Notification Approved',
+            f'Hi {notification.name},\n\nYour notification has been approved for the scheduled time: {notification.scheduled_date}.\n\nThank you!',
+        )
+
+    def rejection_message(self, notification):
+        return (
+            'Notification Rejected',
+            f'Hi {notification.name},\n\nYour notification has been rejected. Please try scheduling another time.\n\nThank you!',
+        )
+
+    def send_approval_email(self, notification):
+        """
+        Queues an approval email to the user when the notification is approved.
+        """
+        enqueue_email(*self.approval_message(notification), notification.email, notification=notification)
 
     def send_rejection_email(self, notification):
         """
-        Sends a rejection email to the user when the notification is rejected.
+        Queues a rejection email to the user when the notification is rejected.
         """
-        try:
-            send_mail(
-                'Notification Rejected',
-                f'Hi {notification.name},\n\nYour notification has been rejected. Please try scheduling another time.\n\nThank you!',
-                settings.DEFAULT_FROM_EMAIL,
-                [notification.email],
-                fail_silently=False,
+        enqueue_email(*self.rejection_message(notification), notification.email, notification=notification)
+
+    @admin.action(description="Accept selected pending notifications")
+    def accept_selected(self, request, queryset):
+        self.decide_selected(request, queryset, 'accepted', self.approval_message)
+
+    @admin.action(description="Reject selected pending notifications")
+    def reject_selected(self, request, queryset):
+        self.decide_selected(request, queryset, 'rejected', self.rejection_message)
+
+    def decide_selected(self, request, queryset, new_status, build_message):
+        """
+        Moves every pending notification of the selection to ``new_status`` with one
+        UPDATE and queues all of their emails with one INSERT. Rows that are not
+        pending are left alone and reported as skipped.
+        """
+        with transaction.atomic():
+            pending = list(
+                queryset.filter(status__in=allowed_sources(new_status))
+                .select_for_update()
+                .only('id', 'name', 'email', 'scheduled_date')
+            )
+            updated = apply_transition(
+                Notification.objects.filter(pk__in=[notification.pk for notification in pending]),
+                new_status
+            )
+            enqueue_emails(
+                (*build_message(notification), notification.email, notification)
+                for notification in pending
             )
-        except Exception as e:
-            logger.error(f"Failed to send rejection email for notification ID {notification.id}: {e}")
+
+        skipped = queryset.count() - updated
+        self.message_user(
+            request,
+            f"{updated} notification(s) {new_status}, {skipped} skipped because they were not pending."
+        )
 
     def save_model(self, request, obj, form, change):
         """
-        Override the save method to send an email when a notification's status is changed.
+        Override the save method to queue an email when a notification's status is changed.
+        The email is written to the outbox in the same transaction as the status change.
         """
-        # Check if the status is 'accepted' and is_verified is True
-        if obj.status == 'accepted' and obj.is_verified == True:
-            obj.is_verified = True  # Ensure the notification is marked as verified
-            obj.save()
-            self.send_approval_email(obj)
+        with transaction.atomic():
+            # Only accepted notifications are verified, as in transitions.transition_fields()
+            obj.is_verified = obj.status == 'accepted'
+            super().save_model(request, obj, form, change)
+
+            if obj.status == 'accepted':
+                self.send_approval_email(obj)
+            elif obj.status == 'rejected':
+                self.send_rejection_email(obj)
+
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['recipient']
+    readonly_fields = ['notification', 'attempts', 'sent_at', 'last_error', 'created_at']
+    actions = ['retry_dead']
+
+    @admin.action(description="Retry selected dead emails")
+    def retry_dead(self, request, queryset):
+        updated = queryset.filter(status='dead').update(status='pending', attempts=0)
+        self.message_user(request, f"{updated} email(s) queued for another attempt.")
+
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the archived notifications.
+    """
+    list_display = ['name', 'email', 'status', 'scheduled_date', 'archived_at']
+    list_filter = ['status', 'is_verified']
+    search_fields = ['email']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class ArchiveCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['cutoff', 'archived', 'last_id', 'started_at', 'finished_at']
+
+    def has_add_permission(self, request):
+        return False
 
-        # Check if the status is 'rejected' and is_verified is False
-        elif obj.status == 'rejected' and obj.is_verified == False:
-            obj.is_verified = False  # Ensure the notification is marked as not verified
-            obj.save()
-            self.send_rejection_email(obj)
+    def has_change_permission(self, request, obj=None):
+        return False
 
-        # Save the object (whether accepted or rejected, status has changed)
-        super().save_model(request, obj, form, change)
 
 # Register the model in the admin site
 admin.site.register(Notification, NotificationAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
+admin.site.register(NotificationArchive, NotificationArchiveAdmin)
+admin.site.register(ArchiveCheckpoint, ArchiveCheckpointAdmin)
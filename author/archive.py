@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchiveCheckpoint, Notification, NotificationArchive
+
+ARCHIVE_COLUMNS = (
+    'id', 'name', 'email', 'scheduled_date', 'duration_minutes', 'is_verified', 'status', 'created_at', 'updated_at'
+)
+
+
+def retention_cutoff(days=None):
+    """
+    Returns the moment before which notifications are archived.
+    """
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 180)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(cutoff):
+    """
+    Notifications that are no longer needed in the live table: the ones scheduled
+    before the cutoff, and rejected ones last changed before it.
+    """
+    return Notification.objects.filter(
+        Q(scheduled_date__lt=cutoff) | Q(status='rejected', updated_at__lt=cutoff)
+    )
+
+
+def get_checkpoint(cutoff, restart=False):
+    """
+    Returns the unfinished run to resume, or starts a new one at ``cutoff``.
+    """
+    unfinished = ArchiveCheckpoint.objects.filter(finished_at__isnull=True)
+    if restart:
+        unfinished.update(finished_at=timezone.now())
+    else:
+        checkpoint = unfinished.order_by('-started_at').first()
+        if checkpoint is not None:
+            return checkpoint
+    return ArchiveCheckpoint.objects.create(cutoff=cutoff)
+
+
+def archive_batch(checkpoint, batch_size):
+    """
+    Moves the next ``batch_size`` archivable notifications after the checkpoint to the
+    archive table in one short transaction, and advances the checkpoint with them.
+    Returns the number of rows moved, 0 once the run is complete.
+    """
+    with transaction.atomic():
+        rows = list(
+            archivable(checkpoint.cutoff)
+            .filter(id__gt=checkpoint.last_id)
+            .order_by('id')
+            .select_for_update()
+            .values(*ARCHIVE_COLUMNS)[:batch_size]
+        )
+        if not rows:
+            checkpoint.finished_at = timezone.now()
+            checkpoint.save(update_fields=['finished_at'])
+            return 0
+
+        ids = [row['id'] for row in rows]
+        # Conflicts can only be copies left by an earlier run, which are identical
+        NotificationArchive.objects.bulk_create(
+            [NotificationArchive(**row) for row in rows], ignore_conflicts=True
+        )
+        Notification.objects.filter(pk__in=ids).delete()
+
+        checkpoint.last_id = ids[-1]
+        checkpoint.archived += len(rows)
+        checkpoint.save(update_fields=['last_id', 'archived'])
+    return len(rows)
@@ -0,0 +1,21 @@
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from . import urls
+from .async_views import *
+
+# Same routes and names as author.urls, with the async views swapped in where they exist
+ASYNC_VIEWS = {
+    'notification-list': AsyncNotificationListView,
+    'notification-create': AsyncNotificationCreateView,
+    'notification-update': AsyncNotificationUpdateView,
+    'notification-delete': AsyncNotificationDeleteView,
+    'notification-decision': AsyncNotificationAdminDecisionView,
+}
+
+urlpatterns = [
+    # Like DRF's APIView, the JSON API does not use session CSRF protection
+    path(str(pattern.pattern), csrf_exempt(ASYNC_VIEWS[pattern.name].as_view()), name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in urls.urlpatterns
+]
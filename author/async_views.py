@@ -0,0 +1,253 @@
+"""
+Native async versions of the notification endpoints, for running the API on an ASGI
+server. Select them with ``NOTIFICATION_API_ASYNC = True``, see ``async_urls``.
+
+Listing and deleting use Django's async ORM, so a request waiting on the database does
+not hold a worker thread. Creating, updating and deciding need a transaction, which the
+async ORM doesn't offer yet: they run their queries in a thread via ``sync_to_async``
+(``acreate_pending``, ``aupdate_unverified``, ``transition``), like sync views would.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse, QueryDict
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+from rest_framework import status
+
+from .cache import get_cached_list, list_etag, list_last_modified, set_cached_list
+from .idempotency import idempotent
+from .models import Notification, SlotBusy
+from .pagination import InvalidCursor, NotificationCursorPagination
+from .renderers import NotificationJSONRenderer
+from .search import InvalidSearch, apply_search
+from .serializers import (
+    NOTIFICATION_COLUMNS, InvalidFields, NotificationSerializer, notification_columns, parse_fields,
+    serialize_notification_rows,
+)
+from .transitions import ACTIONS, InvalidTransition, transition
+from .views import if_match_version, version_etag
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    """
+    Renders ``data`` with the same renderer as the sync API, so both produce identical bytes.
+    """
+    return HttpResponse(
+        NotificationJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code
+    )
+
+
+def parse_body(request):
+    """
+    Reads a JSON or form encoded request body (Django only parses forms for POST).
+    """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    if request.method == 'POST':
+        return request.POST
+    return QueryDict(request.body)
+
+
+def invalid_body():
+    return render({'message': 'Malformed request body'}, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncNotificationListView(View):
+    """
+    Handles GET requests for retrieving notifications.
+    """
+
+    # Same validators and list cache as NotificationListView
+    @method_decorator(condition(
+        etag_func=lambda request: list_etag(request.GET),
+        last_modified_func=lambda request: list_last_modified(request.GET)
+    ))
+    async def get(self, request):
+        cache_key, data = await sync_to_async(get_cached_list)(request.GET)
+        if data is not None:
+            return render(data)
+
+        is_verified = request.GET.get('verified', None)
+        notifications = Notification.objects.all()
+
+        if is_verified is not None:
+            is_verified = is_verified.lower() == 'true'
+            notifications = notifications.verified(is_verified)
+
+        try:
+            notifications = apply_search(notifications, request.GET)
+        except InvalidSearch:
+            return render({'message': 'Invalid search query'}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            fields = parse_fields(request.GET.get('fields'))
+        except InvalidFields:
+            return render({'message': 'Invalid fields'}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            paginator = NotificationCursorPagination(request)
+        except InvalidCursor:
+            return render({'message': 'Invalid cursor'}, status.HTTP_400_BAD_REQUEST)
+
+        window = paginator.get_window(notifications.values(*notification_columns(fields)))
+        page, next_cursor, previous_cursor = paginator.paginate([row async for row in window])
+        data = {
+            'message': 'Notifications retrieved successfully',
+            'next': next_cursor,
+            'previous': previous_cursor,
+            'notifications': serialize_notification_rows(page, fields)
+        }
+
+        # Counting is a full scan of the filtered rows, so only do it on request
+        if request.GET.get('include_count', '').lower() == 'true':
+            data['count'] = await notifications.acount()
+
+        await sync_to_async(set_cached_list)(cache_key, data)
+        return render(data)
+
+
+class AsyncNotificationCreateView(View):
+    """
+    Handles POST requests for creating notifications.
+    """
+
+    @idempotent
+    async def post(self, request):
+        data = parse_body(request)
+        if data is None:
+            return invalid_body()
+
+        serializer = NotificationSerializer(data=data)
+        if not serializer.is_valid():
+            return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        # The overlap check and the insert share a transaction, see create_pending
+        try:
+            await Notification.objects.acreate_pending(**serializer.validated_data)
+        except SlotBusy:
+            return render(
+                {"message": "Other bookings of this time slot are in progress. Please retry."},
+                status.HTTP_409_CONFLICT
+            )
+        except IntegrityError:
+            return render(
+                {"message": "This time slot is already taken or pending. Please choose a different time."},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        return render(
+            {"message": "Notification submitted successfully. Please wait for admin validation."},
+            status.HTTP_201_CREATED
+        )
+
+
+class AsyncNotificationUpdateView(View):
+    """
+    Handles PUT requests for updating notifications.
+    """
+
+    async def put(self, request, pk=None):
+        try:
+            expected_version = if_match_version(request)
+        except ValueError:
+            return render({'message': 'Invalid If-Match header'}, status.HTTP_400_BAD_REQUEST)
+
+        data = parse_body(request)
+        if data is None:
+            return invalid_body()
+
+        serializer = NotificationSerializer(data=data, partial=True)
+        if not serializer.is_valid():
+            return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated = await Notification.objects.aupdate_unverified(
+                pk, serializer.validated_data, version=expected_version
+            )
+        except SlotBusy:
+            return render(
+                {"message": "Other bookings of this time slot are in progress. Please retry."},
+                status.HTTP_409_CONFLICT
+            )
+        except IntegrityError:
+            return render(
+                {"message": "This time slot is already taken or pending. Please choose a different time."},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        row = await Notification.objects.filter(pk=pk).values(*NOTIFICATION_COLUMNS, 'version').afirst()
+        if row is None:
+            return render({'message': 'Notification not found'}, status.HTTP_404_NOT_FOUND)
+        if not updated and row['is_verified']:
+            return render(
+                {'message': 'Cannot update a verified notification'},
+                status.HTTP_400_BAD_REQUEST
+            )
+        if not updated:
+            response = render(
+                {'message': 'The notification was changed by someone else.', 'version': row['version']},
+                status.HTTP_409_CONFLICT
+            )
+        else:
+            response = render({
+                'message': 'Notification updated successfully',
+                'notification': serialize_notification_rows([row])[0]
+            })
+        response['ETag'] = version_etag(row['version'])
+        return response
+
+
+class AsyncNotificationDeleteView(View):
+    """
+    Handles DELETE requests for deleting notifications.
+    """
+
+    async def delete(self, request, pk=None):
+        try:
+            notification = await Notification.objects.aget(pk=pk)
+        except Notification.DoesNotExist:
+            return render({'message': 'Notification not found'}, status.HTTP_404_NOT_FOUND)
+
+        await notification.adelete()
+        return render({'message': 'Notification deleted successfully'}, status.HTTP_204_NO_CONTENT)
+
+
+class AsyncNotificationAdminDecisionView(View):
+    """
+    Allows the admin to accept or reject a notification request via API.
+    """
+
+    @idempotent
+    async def post(self, request, pk=None):
+        data = parse_body(request)
+        if data is None:
+            return invalid_body()
+
+        action = str(data.get('action', '')).lower()
+        if action not in ACTIONS:
+            return render(
+                {'message': "Invalid action. Please use 'accept' or 'reject'."},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        new_status = ACTIONS[action]
+        try:
+            await sync_to_async(transition)(pk, new_status)
+        except Notification.DoesNotExist:
+            return render({'message': 'Notification not found'}, status.HTTP_404_NOT_FOUND)
+        except InvalidTransition as exc:
+            return render(
+                {'message': f'Cannot {action} a notification that is already {exc.current_status}.',
+                 'status': exc.current_status},
+                status.HTTP_409_CONFLICT
+            )
+
+        return render({'message': f'Notification {new_status} successfully.'})
@@ -0,0 +1,74 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from django.utils import timezone
+
+from .cache import get_notifications_version, read_caching_enabled
+from .models import Notification
+
+# Per-process cache of occupied slots: (start, end) -> (notifications version, slots)
+_occupied_cache = {}
+_OCCUPIED_CACHE_SIZE = 128
+
+
+def overlaps(slots, start, end):
+    """
+    Whether ``[start, end)`` overlaps one of ``slots``, a list of ``(start, end)`` slots
+    sorted by start. Like the database check, only the slots starting less than
+    ``Notification.MAX_DURATION`` before ``start`` are looked at.
+    """
+    first = bisect_right(slots, start - Notification.MAX_DURATION, key=itemgetter(0))
+    last = bisect_left(slots, end, key=itemgetter(0))
+    return any(slot_end > start for _, slot_end in slots[first:last])
+
+
+def occupied_slots(start, end):
+    """
+    Returns the ``(start, end)`` slots of the pending and accepted notifications that
+    overlap ``[start, end)``, sorted by start, loaded with one range query on the
+    (active_slot, active_end) index. Results are kept per process until the
+    notifications version changes, where that is safe (see read_caching_enabled).
+    """
+    version = get_notifications_version() if read_caching_enabled() else None
+    cached = _occupied_cache.get((start, end))
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1]
+
+    slots = list(
+        Notification.objects
+        .overlapping(start, end)
+        .order_by('active_slot')
+        .values_list('active_slot', 'active_end')
+    )
+    if version is not None:
+        if len(_occupied_cache) >= _OCCUPIED_CACHE_SIZE:
+            _occupied_cache.clear()
+        _occupied_cache[(start, end)] = (version, slots)
+    return slots
+
+
+def free_slots(start_date, end_date, slot_length, work_start, work_end, now=None):
+    """
+    Lists the free ``(start, end)`` slots of ``slot_length`` between ``work_start`` and
+    ``work_end`` on every day from ``start_date`` to ``end_date`` inclusive. A slot is
+    taken when a booking overlaps it; slots that already began are left out.
+    """
+    tz = timezone.get_current_timezone()
+    now = now or timezone.now()
+    range_start = datetime.combine(start_date, work_start, tzinfo=tz)
+    range_end = datetime.combine(end_date, work_end, tzinfo=tz)
+    occupied = occupied_slots(range_start, range_end)
+
+    slots = []
+    day = start_date
+    while day <= end_date:
+        slot_start = datetime.combine(day, work_start, tzinfo=tz)
+        day_end = datetime.combine(day, work_end, tzinfo=tz)
+        while slot_start + slot_length <= day_end:
+            slot_end = slot_start + slot_length
+            if slot_start >= now and not overlaps(occupied, slot_start, slot_end):
+                slots.append((slot_start, slot_end))
+            slot_start = slot_end
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,434 @@
+"""
+Endpoint benchmarks for the notification API.
+
+Every route in ``author.urls`` has at least one scenario here. ``run_benchmarks`` drives
+each scenario through the Django test client and reports latency percentiles,
+throughput and queries per request; ``QUERY_BUDGETS`` caps the number of queries a
+single request of each route may run. Use ``python manage.py benchmark_api`` to run
+it against a seeded throwaway database; the test suite checks the budgets.
+``compare_search`` times the old ``icontains`` search against the indexed ones
+(``benchmark_api --compare-search``), ``benchmark_admin_changelist`` the admin
+changelist pages (``--admin``), ``compare_payloads`` the size and latency of list
+pages with and without ``?fields=`` and compression (``--compare-payloads``),
+``benchmark_slot_checks`` the overlap check of new bookings (``--slot-checks``) and
+``compare_serialization`` the serializer against the fast list path
+(``--compare-serialization``).
+"""
+import math
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from . import availability
+from .admin import NotificationAdmin
+from .changelist import EstimatedCountPaginator
+from .middleware import ENCODINGS
+from .models import Notification
+from .pagination import encode_cursor
+from .renderers import NotificationJSONRenderer
+from .search import filter_prefix, filter_tokens
+from .serializers import NOTIFICATION_COLUMNS, NotificationSerializer, serialize_notification_rows
+
+# Maximum number of SQL statements (savepoints excluded) one request may run
+QUERY_BUDGETS = {
+    'notification-list': 1,
+    # Day locks, overlap lookup, INSERT. The first booking of a day also inserts and
+    # locks the day's lock row, see lock_slot_days
+    'notification-create': 5,
+    'notification-bulk-create': 5,
+    'notification-availability': 1,
+    'notification-calendar': 1,
+    # One query per NOTIFICATION_EXPORT_CHUNK_SIZE rows, the scenario exports one day
+    'notification-export': 1,
+    'notification-archive-list': 1,
+    'notification-detail': 2,
+    'notification-update': 2,
+    'notification-delete': 3,
+    'notification-decision': 1,
+    'notification-batch-decision': 2,
+}
+
+# name: label in the report, route: URL name (for the query budget),
+# prepare: callable(i) -> (method, path, data), run untimed before request i
+Scenario = namedtuple('Scenario', ['name', 'route', 'prepare'])
+
+SEED_START = datetime(2031, 1, 1, tzinfo=dt_timezone.utc)
+# Bookings made by the benchmark itself start here, after the seeded rows (ten million
+# rows ten minutes apart reach 2221)
+BENCH_START = datetime(2300, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def seed_notifications(rows, batch_size=5000):
+    """
+    Fills the notification table with ``rows`` ten minute slots, back to back: 60%
+    pending, 25% accepted and 15% rejected.
+    """
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, rows)):
+            scheduled_date = SEED_START + timedelta(minutes=10 * i)
+            bucket = i % 20
+            notification_status = 'pending' if bucket < 12 else 'accepted' if bucket < 17 else 'rejected'
+            active = notification_status != 'rejected'
+            batch.append(Notification(
+                name=f'User {i}',
+                email=f'user{i}@example.com',
+                scheduled_date=scheduled_date,
+                duration_minutes=10,
+                status=notification_status,
+                is_verified=notification_status == 'accepted',
+                active_slot=scheduled_date if active else None,
+                active_end=scheduled_date + timedelta(minutes=10) if active else None,
+            ))
+        Notification.objects.bulk_create(batch)
+
+
+# Transaction control statements, not counted against the budgets. Savepoints replace
+# BEGIN/COMMIT when the request runs inside a test transaction.
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+def count_queries(captured):
+    """
+    Counts the statements of a request, leaving out transaction control.
+    """
+    return sum(1 for query in captured if not query['sql'].startswith(TRANSACTION_STATEMENTS))
+
+
+def build_scenarios():
+    """
+    Builds the scenarios against the rows currently in the database.
+    """
+    first = Notification.objects.order_by('id').values('id', 'created_at').first()
+    deep = Notification.objects.order_by('-created_at', '-id').values('id', 'created_at')[50:51].first()
+
+    def bench_slot(i, base=0):
+        return BENCH_START + timedelta(days=base, minutes=i)
+
+    def new_notification(i, base, **kwargs):
+        return Notification.objects.create(
+            name=f'Bench {i}',
+            email=f'bench{i}@example.com',
+            scheduled_date=bench_slot(i, base),
+            **kwargs
+        )
+
+    def list_page(params):
+        def prepare(i):
+            cache.clear()
+            return 'get', reverse('notification-list'), params
+        return prepare
+
+    def availability_range(i):
+        availability._occupied_cache.clear()
+        cache.clear()
+        return 'get', reverse('notification-availability'), {
+            'start': '2031-01-01', 'end': '2031-01-31', 'slot_minutes': 30
+        }
+
+    scenarios = [
+        Scenario('notification-list', 'notification-list', list_page({})),
+        Scenario('notification-list:verified', 'notification-list', list_page({'verified': 'true'})),
+        Scenario('notification-list:prefix', 'notification-list', list_page({'prefix': 'user12'})),
+        Scenario('notification-list:search', 'notification-list', list_page({'search': 'user12 example'})),
+        Scenario('notification-list:fields', 'notification-list', list_page({'fields': 'id,scheduled_date,status'})),
+        Scenario('notification-create', 'notification-create', lambda i: ('post', reverse('notification-create'), {
+            'name': f'Bench {i}', 'email': f'bench{i}@example.com', 'scheduled_date': bench_slot(i * 30).isoformat()
+        })),
+        Scenario('notification-bulk-create', 'notification-bulk-create', lambda i: (
+            'post', reverse('notification-bulk-create'), [
+                {'name': f'Bulk {i}', 'email': f'bulk{i}@example.com',
+                 'scheduled_date': bench_slot((i * 50 + j) * 30, base=100).isoformat()}
+                for j in range(50)
+            ]
+        )),
+        Scenario('notification-availability', 'notification-availability', availability_range),
+        Scenario('notification-calendar', 'notification-calendar', lambda i: (
+            'get', reverse('notification-calendar'), {'start': '2031-01-01', 'end': '2031-12-31'}
+        )),
+        Scenario('notification-export', 'notification-export', lambda i: (
+            'get', reverse('notification-export'), {'format': 'ndjson', 'start': '2031-01-02', 'end': '2031-01-02'}
+        )),
+        Scenario('notification-archive-list', 'notification-archive-list', lambda i: (
+            'get', reverse('notification-archive-list'), {}
+        )),
+        Scenario('notification-update', 'notification-update', lambda i: (
+            'put', reverse('notification-update', args=[new_notification(i, 200).pk]), {'name': f'Updated {i}'}
+        )),
+        Scenario('notification-delete', 'notification-delete', lambda i: (
+            'delete', reverse('notification-delete', args=[new_notification(i, 300).pk]), None
+        )),
+        Scenario('notification-decision', 'notification-decision', lambda i: (
+            'post', reverse('notification-decision', args=[new_notification(i, 400).pk]), {'action': 'accept'}
+        )),
+        Scenario('notification-batch-decision', 'notification-batch-decision', lambda i: (
+            'post', reverse('notification-batch-decision'), {
+                'action': 'accept',
+                'ids': [new_notification(i * 50 + j, 500).pk for j in range(50)]
+            }
+        )),
+    ]
+    if first is not None:
+        scenarios.append(Scenario('notification-detail', 'notification-detail', lambda i: (
+            'get', reverse('notification-detail', args=[first['id']]), None
+        )))
+    if deep is not None:
+        # A page near the end of the table should cost the same as the first one
+        scenarios.append(Scenario('notification-list:deep', 'notification-list', list_page({
+            'cursor': encode_cursor(deep['created_at'], deep['id'])
+        })))
+    return scenarios
+
+
+def percentile(samples, percent):
+    """
+    Nearest-rank percentile of a list of samples.
+    """
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_timings(samples):
+    """
+    The number of samples and their p50, p95 and mean, in milliseconds, of a list of
+    durations in seconds.
+    """
+    return {
+        'iterations': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+def time_calls(run, iterations, setup=None):
+    """
+    Calls ``run()`` ``iterations`` times, each time after ``setup()`` which is not
+    timed. Returns the durations and the result of the last call.
+    """
+    samples, result = [], None
+    for i in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def run_scenario(client, scenario, iterations):
+    timings, queries, statuses = [], [], set()
+    for i in range(iterations):
+        method, path, data = scenario.prepare(i)
+        kwargs = {'content_type': 'application/json'} if method != 'get' else {}
+        if method == 'get':
+            kwargs['data'] = data
+
+        # A full query log (seeding large tables fills it) would hide the request's queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            if method == 'get':
+                response = client.get(path, **kwargs)
+            else:
+                response = getattr(client, method)(path, data, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            timings.append(time.perf_counter() - start)
+        queries.append(count_queries(captured.captured_queries))
+        statuses.add(response.status_code)
+
+    budget = QUERY_BUDGETS.get(scenario.route)
+    return {
+        'route': scenario.route,
+        **summarize_timings(timings),
+        'status_codes': sorted(statuses),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'throughput_rps': round(iterations / sum(timings), 1),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'query_budget': budget,
+        'within_budget': budget is None or max(queries) <= budget,
+    }
+
+
+def run_benchmarks(iterations=50, only=None):
+    """
+    Runs every scenario (or the ones named in ``only``) and returns the results keyed
+    by scenario name.
+    """
+    client = Client()
+    results = {}
+    for scenario in build_scenarios():
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(client, scenario, iterations)
+    return results
+
+
+# The old admin search, and the indexed prefix and full-text searches replacing it
+SEARCH_METHODS = {
+    'icontains': lambda queryset, term: queryset.filter(Q(name__icontains=term) | Q(email__icontains=term)),
+    'prefix': filter_prefix,
+    'fulltext': filter_tokens,
+}
+
+
+def compare_search(iterations=50, page_size=50):
+    """
+    Times one page of search results with each of the SEARCH_METHODS, for terms that
+    match a few seeded rows (``user12345``) and many of them (``user1``). Returns the
+    results keyed by ``method:term``.
+    """
+    results = {}
+    for term in ('user12345', 'user1'):
+        for method, search in SEARCH_METHODS.items():
+            timings, rows = time_calls(lambda: list(
+                search(Notification.objects.all(), term).order_by('created_at', 'id')
+                .values_list('id', flat=True)[:page_size]
+            ), iterations)
+            results[f'{method}:{term}'] = {**summarize_timings(timings), 'rows': len(rows)}
+    return results
+
+
+def benchmark_admin_changelist(iterations=20):
+    """
+    Times admin changelist pages: the first page, filtered and searched pages, the last
+    numbered page and a page far down the list reached by cursor. Returns the results
+    keyed by page name.
+    """
+    user = User.objects.filter(username='benchmark-admin').first() or User.objects.create_superuser(
+        'benchmark-admin', 'benchmark-admin@example.com', None
+    )
+    client = Client()
+    client.force_login(user)
+    if connection.vendor == 'sqlite':
+        # Table statistics, which MySQL keeps up to date by itself
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE author_notification')
+
+    url = reverse('admin:author_notification_changelist')
+    deep = Notification.objects.order_by('created_at', 'id').values('id', 'created_at')[50:51].first()
+    pages = {
+        'changelist': {},
+        'changelist:status': {'status__exact': 'pending'},
+        'changelist:verified': {'is_verified__exact': '1'},
+        'changelist:search': {'q': 'user12345'},
+        'changelist:last-page': {
+            'p': EstimatedCountPaginator(Notification.objects.order_by('-id'), NotificationAdmin.list_per_page).num_pages
+        },
+    }
+    if deep is not None:
+        pages['changelist:cursor-deep'] = {'cursor': encode_cursor(deep['created_at'], deep['id'])}
+
+    results = {}
+    for name, params in pages.items():
+        statuses = set()
+
+        def get():
+            statuses.add(client.get(url, params).status_code)
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            timings, _ = time_calls(get, iterations)
+        results[name] = {
+            **summarize_timings(timings),
+            'status_codes': sorted(statuses),
+            'queries_per_request': round(count_queries(captured.captured_queries) / iterations, 2),
+        }
+    return results
+
+
+# The full representation, and the fields mobile clients need
+PAYLOAD_FIELDS = {
+    'all': None,
+    'mobile': 'id,scheduled_date,status',
+}
+
+
+def compare_payloads(iterations=50, page_size=500):
+    """
+    Fetches a list page of ``page_size`` rows with every PAYLOAD_FIELDS selection, once
+    uncompressed and once with each available coding of ENCODINGS. Returns the response
+    size and latency keyed by ``fields:encoding``.
+    """
+    client = Client()
+    results = {}
+    for label, fields in PAYLOAD_FIELDS.items():
+        params = {'page_size': page_size}
+        if fields:
+            params['fields'] = fields
+        for encoding in ('identity', *ENCODINGS):
+            timings, response = time_calls(
+                lambda: client.get(reverse('notification-list'), params, HTTP_ACCEPT_ENCODING=encoding),
+                iterations, setup=cache.clear
+            )
+            results[f'{label}:{encoding}'] = {
+                **summarize_timings(timings),
+                'status_codes': [response.status_code],
+                'content_encoding': response.get('Content-Encoding', 'identity'),
+                'bytes': len(response.content),
+            }
+    return results
+
+
+def benchmark_slot_checks(iterations=50):
+    """
+    Times the overlap check a new booking runs, ``Notification.objects.overlapping()``,
+    in the middle of the seeded slots, on the slot of a rejected seed, inside a seeded
+    slot and after the seeded range, next to the exact start time lookup it replaced.
+    Returns the timings and whether the slot was taken, keyed by ``check:slot``.
+    """
+    rows = Notification.objects.count()
+    middle = SEED_START + timedelta(minutes=10 * (rows // 2 // 20 * 20))
+    slots = {
+        'taken': middle,
+        # Seeds 17 to 19 of every 20 are rejected, see seed_notifications
+        'rejected': middle + timedelta(minutes=10 * 17),
+        'inside': middle + timedelta(minutes=5),
+        'free': SEED_START + timedelta(minutes=10 * rows),
+    }
+    checks = {
+        'overlap': lambda start: Notification.objects.overlapping(start, start + timedelta(minutes=10)).exists(),
+        'equality': lambda start: Notification.objects.filter(active_slot=start).exists(),
+    }
+
+    results = {}
+    for check, run in checks.items():
+        for name, start in slots.items():
+            timings, taken = time_calls(lambda: run(start), iterations)
+            results[f'{check}:{name}'] = {**summarize_timings(timings), 'taken': taken}
+    return results
+
+
+def compare_serialization(iterations=50, rows=500):
+    """
+    Times building and rendering ``rows`` notifications with ``NotificationSerializer``
+    and ``JSONRenderer``, and with the fast path of the list endpoints: plain column
+    values through ``serialize_notification_rows`` and ``NotificationJSONRenderer``.
+    Returns the timings keyed by path.
+    """
+    notifications = Notification.objects.order_by('id')[:rows]
+    paths = {
+        'serializer': lambda: JSONRenderer().render(NotificationSerializer(notifications, many=True).data),
+        'fast': lambda: NotificationJSONRenderer().render(
+            serialize_notification_rows(notifications.values(*NOTIFICATION_COLUMNS))
+        ),
+    }
+
+    results = {}
+    for name, run in paths.items():
+        timings, body = time_calls(run, iterations)
+        results[name] = {**summarize_timings(timings), 'bytes': len(body)}
+    return results
@@ -0,0 +1,134 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .routers import primary_pinned
+
+VERSION_KEY = 'notifications:version'
+LAST_MODIFIED_KEY = 'notifications:last_modified'
+
+
+def versioning_enabled():
+    """
+    Whether the notifications version can back caches and validators. A locmem cache
+    lives in one process: a write handled by one worker never bumps the version the
+    others read, so they would serve stale lists and 304s indefinitely. On locmem it is
+    only used when NOTIFICATION_CACHE_SINGLE_PROCESS says one process serves the site.
+    """
+    return (
+        not isinstance(caches['default'], LocMemCache)
+        or getattr(settings, 'NOTIFICATION_CACHE_SINGLE_PROCESS', False)
+    )
+
+
+def get_notifications_version():
+    """
+    Returns the current notifications version. Every write to the notification table
+    bumps it, so anything cached under an older version is never read again.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1, so a counter that got evicted from the
+        # cache cannot come back at a value older entries were stored under
+        cache.add(VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_notifications_last_modified():
+    """
+    Returns when the notifications last changed. If that was forgotten, assume now:
+    clients re-download once instead of being told nothing changed.
+    """
+    last_modified = cache.get(LAST_MODIFIED_KEY)
+    if last_modified is None:
+        cache.add(LAST_MODIFIED_KEY, time.time(), None)
+        last_modified = cache.get(LAST_MODIFIED_KEY)
+    return datetime.fromtimestamp(last_modified, tz=timezone.utc)
+
+
+def bump_notifications_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_notifications_version()
+    cache.set(LAST_MODIFIED_KEY, time.time(), None)
+
+
+def notifications_changed(using=None):
+    """
+    Bumps the version once the current transaction commits, so readers can't cache
+    data from before the commit under the new version.
+    """
+    transaction.on_commit(bump_notifications_version, using=using)
+
+
+def list_signature(query_params):
+    """
+    Identifies a notification listing: the notifications version plus a digest of the
+    normalized query parameters. Used both as cache key and as ETag.
+    """
+    params = urlencode(sorted(
+        (key, value) for key in query_params for value in query_params.getlist(key)
+    ))
+    digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+    return f'{get_notifications_version()}-{digest}'
+
+
+def read_caching_enabled():
+    """
+    Whether the current request may use data cached under the notifications version,
+    and get validators built from it.
+
+    With read replicas, a replica that lags behind a write can build data that is
+    cached, or validated by ETag, under the version that write bumped. So requests
+    pinned to the primary to read their own writes (ReplicaPinningMiddleware) never
+    use the cache or validators, and other requests don't within REPLICA_PIN_SECONDS
+    of the last write.
+    """
+    if not versioning_enabled():
+        return False
+    if not getattr(settings, 'DATABASE_REPLICAS', []):
+        return True
+    if primary_pinned():
+        return False
+    age = time.time() - get_notifications_last_modified().timestamp()
+    return age >= getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def list_etag(query_params):
+    if not read_caching_enabled():
+        return None
+    return f'"{list_signature(query_params)}"'
+
+
+def list_last_modified(query_params):
+    if not read_caching_enabled():
+        return None
+    return get_notifications_last_modified()
+
+
+def list_cache_key(query_params):
+    return f'notifications:list:{list_signature(query_params)}'
+
+
+def get_cached_list(query_params):
+    """
+    Returns the cache key of a listing and its cached data. The key is None when
+    listings can't be cached, see read_caching_enabled.
+    """
+    if not read_caching_enabled():
+        return None, None
+    key = list_cache_key(query_params)
+    return key, cache.get(key)
+
+
+def set_cached_list(key, data):
+    if key is not None:
+        cache.set(key, data, getattr(settings, 'NOTIFICATION_LIST_CACHE_TIMEOUT', 300))
@@ -0,0 +1,201 @@
+"""
+Admin changelist pieces that keep the notification changelist fast on large tables.
+
+Counting every matching row is the slowest part of a changelist page at millions of
+rows, so the paginator estimates: the row count from table statistics when nothing is
+filtered, otherwise a count that stops at ``NOTIFICATION_ADMIN_COUNT_LIMIT``. Numbered
+pages stop at ``NOTIFICATION_ADMIN_MAX_PAGES``, deeper pages are reached with keyset
+cursors over the admin ordering ``(-created_at, -id)``, see NotificationChangeList.
+The date hierarchy finds its years, months and days with index seeks instead of a
+DISTINCT over the whole table, see ChangeListQuerySet.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import NotificationQuerySet
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+CURSOR_VAR = 'cursor'
+# Columns shown in the changelist, plus the ones its cursor and links need
+CHANGELIST_COLUMNS = ('id', 'name', 'email', 'status', 'is_verified', 'scheduled_date', 'created_at')
+
+
+def table_row_estimate(model, using):
+    """
+    Returns the row count the database keeps in its table statistics, or None when it
+    has none (SQLite before ANALYZE, other databases).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table]
+                )
+            elif connection.vendor == 'sqlite':
+                # The first number of every stat is the number of rows in the table
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            else:
+                return None
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    counts = [int(str(row[0]).split()[0]) for row in rows if row[0] is not None]
+    return max(counts) if counts else None
+
+
+def estimated_count(queryset):
+    """
+    Table statistics for an unfiltered queryset, otherwise the number of matching rows
+    counted up to ``NOTIFICATION_ADMIN_COUNT_LIMIT``.
+    """
+    if not queryset.query.where:
+        estimate = table_row_estimate(queryset.model, queryset.db)
+        if estimate is not None:
+            return estimate
+    limit = getattr(settings, 'NOTIFICATION_ADMIN_COUNT_LIMIT', 10000)
+    return queryset.order_by()[:limit].count()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator with an estimated count and at most ``NOTIFICATION_ADMIN_MAX_PAGES`` pages,
+    so no page needs a large OFFSET.
+    """
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+    @cached_property
+    def num_pages(self):
+        return min(super().num_pages, getattr(settings, 'NOTIFICATION_ADMIN_MAX_PAGES', 20))
+
+
+def truncate(value, kind):
+    if kind == 'year':
+        return datetime.combine(value.date().replace(month=1, day=1), time(), tzinfo=value.tzinfo)
+    if kind == 'month':
+        return datetime.combine(value.date().replace(day=1), time(), tzinfo=value.tzinfo)
+    return datetime.combine(value.date(), time(), tzinfo=value.tzinfo)
+
+
+def next_period(start, kind):
+    if kind == 'year':
+        return start.replace(year=start.year + 1)
+    if kind == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return datetime.combine(start.date() + timedelta(days=1), time(), tzinfo=start.tzinfo)
+
+
+class ChangeListQuerySet(NotificationQuerySet):
+    """
+    The changelist queryset. ``datetimes()``, which the date hierarchy uses to list the
+    years, months or days that have rows, jumps from one period to the next with one
+    ``ORDER BY ... LIMIT 1`` index seek per period (a loose index scan).
+    """
+
+    def aggregate(self, *args, **kwargs):
+        # The date hierarchy asks for MIN() and MAX() of its field in one query, which
+        # SQLite answers with a full scan. Two index seeks find the same values.
+        if args or not kwargs or not all(
+            type(aggregate) in (Min, Max) and aggregate.filter is None
+            and isinstance(aggregate.source_expressions[0], F)
+            for aggregate in kwargs.values()
+        ):
+            return super().aggregate(*args, **kwargs)
+        result = {}
+        for name, aggregate in kwargs.items():
+            field_name = aggregate.source_expressions[0].name
+            ordering = f'-{field_name}' if isinstance(aggregate, Max) else field_name
+            result[name] = (
+                self.filter(**{f'{field_name}__isnull': False})
+                .order_by(ordering).values_list(field_name, flat=True).first()
+            )
+        return result
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tz = tzinfo or timezone.get_current_timezone()
+        ordered = self.order_by(field_name).values_list(field_name, flat=True)
+
+        periods = []
+        value = ordered.first()
+        while value is not None:
+            start = truncate(timezone.localtime(value, tz), kind)
+            periods.append(start)
+            value = ordered.filter(**{f'{field_name}__gte': next_period(start, kind)}).first()
+        return periods if order == 'ASC' else periods[::-1]
+
+
+class NotificationChangeList(ChangeList):
+    """
+    Loads only the displayed columns, and with ``?cursor=`` shows the page after a row
+    of the default ordering instead of a numbered page.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = None
+        self.next_cursor = None
+        cursor = request.GET.get(CURSOR_VAR)
+        if cursor:
+            try:
+                created_at, pk, _ = decode_cursor(cursor)
+                self.cursor = (created_at, pk)
+            except InvalidCursor:
+                pass
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    @property
+    def keyset(self):
+        # Cursors follow the default ordering, not a column the user sorted by
+        return ORDER_VAR not in self.params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters).only(*CHANGELIST_COLUMNS)
+        queryset = ChangeListQuerySet(queryset.model, queryset.query.chain(), queryset.db)
+        # Counted and paginated without the cursor, see get_results()
+        self.full_queryset = queryset
+        if self.cursor is not None and self.keyset:
+            created_at, pk = self.cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return queryset
+
+    def get_results(self, request):
+        if self.cursor is None or not self.keyset:
+            super().get_results(request)
+        else:
+            # The count and date hierarchy are the ones of the whole list, the rows are
+            # the page after the cursor
+            cursor_queryset, self.queryset = self.queryset, self.full_queryset
+            super().get_results(request)
+            self.result_list = cursor_queryset[:self.list_per_page]
+            self.multi_page = False
+
+        if self.keyset:
+            self.result_list = list(self.result_list)
+            if len(self.result_list) == self.list_per_page:
+                last = self.result_list[-1]
+                self.next_cursor = encode_cursor(last.created_at, last.pk)
+
+    @property
+    def next_cursor_url(self):
+        if self.next_cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}, [PAGE_VAR])
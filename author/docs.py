@@ -0,0 +1,191 @@
+"""
+API documentation without importing drf_yasg in API-only processes.
+
+``swagger_auto_schema`` and ``openapi`` here are stand-ins for the drf_yasg ones: the
+decorator only records its arguments on the view method, and ``openapi.X(...)``
+records the call. ``activate()`` replays them with the real drf_yasg, which happens
+only where a schema is generated: the ``generate_openapi_schema`` command and the
+live documentation served when ``API_DOCS_LIVE`` is on. Everywhere else the
+precomputed schema file is served by ``schema_file_view``.
+"""
+import hashlib
+import importlib
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.views.decorators.http import condition, require_safe
+
+DEFERRED_ATTRIBUTE = '_deferred_swagger_auto_schema'
+
+
+class Deferred:
+    """
+    An attribute of, or a call into, a module that is imported only on ``resolve()``.
+    """
+
+    def __init__(self, module, path=(), call=None):
+        self._module = module
+        self._path = path
+        self._call = call
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Deferred(self._module, self._path + (name,))
+
+    def __call__(self, *args, **kwargs):
+        return Deferred(self._module, self._path, (args, kwargs))
+
+    def resolve(self):
+        value = importlib.import_module(self._module)
+        for name in self._path:
+            value = getattr(value, name)
+        if self._call is not None:
+            args, kwargs = self._call
+            value = value(*resolve(args), **resolve(kwargs))
+        return value
+
+
+def resolve(value):
+    """
+    Replaces every ``Deferred`` in ``value`` (and the lists, tuples and dicts in it).
+    """
+    if isinstance(value, Deferred):
+        return value.resolve()
+    if isinstance(value, dict):
+        return {key: resolve(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve(item) for item in value)
+    return value
+
+
+openapi = Deferred('drf_yasg.openapi')
+
+
+def swagger_auto_schema(**kwargs):
+    """
+    Records the arguments for drf_yasg's ``swagger_auto_schema``, see ``activate()``.
+    """
+    def decorator(view_method):
+        setattr(view_method, DEFERRED_ATTRIBUTE, kwargs)
+        return view_method
+    return decorator
+
+
+def iter_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+_activated = False
+
+
+def activate():
+    """
+    Applies the real ``swagger_auto_schema`` to every view method of the URLconf that
+    recorded one. Idempotent, so every schema generator can call it.
+    """
+    global _activated
+    if _activated:
+        return
+    from drf_yasg.utils import swagger_auto_schema as real_swagger_auto_schema
+
+    for view_class in set(iter_view_classes(get_resolver().url_patterns)):
+        for method in view_class.http_method_names:
+            view_method = getattr(view_class, method, None)
+            kwargs = getattr(view_method, DEFERRED_ATTRIBUTE, None)
+            if kwargs is not None and not hasattr(view_method, '_swagger_auto_schema'):
+                real_swagger_auto_schema(**resolve(kwargs))(view_method)
+    _activated = True
+
+
+def api_info():
+    from drf_yasg import openapi as real_openapi
+
+    return real_openapi.Info(
+        title="Your API",
+        default_version='v1',
+        description="API documentation",
+    )
+
+
+def generate_schema(format='json'):
+    """
+    Builds the OpenAPI document of the API and returns it encoded as JSON or YAML bytes.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    activate()
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    codec = OpenAPICodecYaml if format == 'yaml' else OpenAPICodecJson
+    return codec(validators=[]).encode(schema)
+
+
+def live_schema_urls():
+    """
+    URL patterns of the drf_yasg views, which generate the schema on every request.
+    Only meant for development (``API_DOCS_LIVE``).
+    """
+    from django.urls import path
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from drf_yasg.views import get_schema_view
+
+    class ActivatingSchemaGenerator(OpenAPISchemaGenerator):
+        def get_schema(self, request=None, public=False):
+            activate()
+            return super().get_schema(request, public)
+
+    schema_view = get_schema_view(api_info(), public=True, generator_class=ActivatingSchemaGenerator)
+    return [
+        path('swagger/schema', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+        path('swagger/schema.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    ]
+
+
+_schema_file = None
+
+
+def load_schema_file():
+    """
+    Reads the schema written by ``generate_openapi_schema`` once per process. Returns
+    ``(content, content_type, etag)``, or None when the file has not been generated.
+    """
+    global _schema_file
+    if _schema_file is None:
+        path = settings.OPENAPI_SCHEMA_PATH
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as schema:
+            content = schema.read()
+        content_type = 'application/yaml' if path.endswith(('.yaml', '.yml')) else 'application/json'
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        _schema_file = (content, content_type, etag)
+    return _schema_file
+
+
+def schema_file_etag(request):
+    schema = load_schema_file()
+    return schema[2] if schema else None
+
+
+@require_safe
+@condition(etag_func=schema_file_etag)
+def schema_file_view(request):
+    """
+    Serves the precomputed OpenAPI schema, with an ETag so clients can revalidate it.
+    """
+    schema = load_schema_file()
+    if schema is None:
+        return HttpResponseNotFound('The API schema has not been generated, run generate_openapi_schema.')
+    content, content_type = schema[:2]
+    response = HttpResponse(content, content_type=content_type)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
@@ -0,0 +1,194 @@
+"""
+``Idempotency-Key`` support for POST endpoints.
+
+The first request with a key claims it by inserting an ``IdempotencyKey`` row, runs the
+view and stores the response on the row. A retry with the same key gets the stored
+response back without running the view again. The unique (scope, key) index decides
+between concurrent duplicates: the loser is told the original is still in progress.
+"""
+import hashlib
+import inspect
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .renderers import NotificationJSONRenderer
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256(request.method.encode())
+    digest.update(b'\n')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def error(message, status_code):
+    return HttpResponse(
+        NotificationJSONRenderer().render({'message': message}),
+        content_type='application/json',
+        status=status_code
+    )
+
+
+def claim(key, scope, fingerprint):
+    """
+    Claims ``key`` for a new request. Returns ``(record, None)`` when the caller owns the
+    key and must run the view, or ``(None, response)`` with the response to send instead.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400))
+
+    # Retries are the common case for a known key, so look it up before inserting
+    record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key, scope=scope, fingerprint=fingerprint, created_at=now, expires_at=expires_at
+                )
+            return record, None
+        except IntegrityError:
+            # A concurrent duplicate inserted it first
+            record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                return None, error('Please retry the request.', status.HTTP_409_CONFLICT)
+
+    # Take over a key that expired but was not purged yet, or whose request never
+    # finished (the process died). The conditional UPDATE lets only one request win.
+    abandoned_before = now - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    if record.expires_at <= now or (record.status_code is None and record.created_at < abandoned_before):
+        taken_over = IdempotencyKey.objects.filter(pk=record.pk).filter(
+            Q(expires_at__lte=now) | Q(status_code__isnull=True, created_at__lt=abandoned_before)
+        ).update(
+            fingerprint=fingerprint, status_code=None, response_body='', created_at=now, expires_at=expires_at
+        )
+        if taken_over:
+            record.refresh_from_db()
+            return record, None
+        # Another request took it over or the purge deleted it meanwhile
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None, error('Please retry the request.', status.HTTP_409_CONFLICT)
+
+    if record.status_code is None:
+        response = error(
+            f'A request with this {HEADER} is still being processed.',
+            status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return None, response
+    if record.fingerprint != fingerprint:
+        return None, error(
+            f'This {HEADER} was already used with a different request.',
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    response = HttpResponse(record.response_body, content_type='application/json', status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return None, response
+
+
+def complete(record, response):
+    """
+    Stores the response of the request that owns ``record``. Server errors are not
+    stored, the key is released so the client can retry.
+    """
+    if response.status_code >= 500:
+        release(record)
+        return
+    if isinstance(response, Response):
+        body = NotificationJSONRenderer().render(response.data)
+    else:
+        body = response.content
+    record.status_code = response.status_code
+    record.response_body = body.decode()
+    record.save(update_fields=['status_code', 'response_body'])
+
+
+def release(record):
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+def check_key(request):
+    key = request.headers.get(HEADER)
+    if key is not None and not 0 < len(key) <= MAX_KEY_LENGTH:
+        return key, error(
+            f'{HEADER} must be between 1 and {MAX_KEY_LENGTH} characters.',
+            status.HTTP_400_BAD_REQUEST
+        )
+    return key, None
+
+
+def idempotent(view_method):
+    """
+    Makes a (sync or async) view method honour the ``Idempotency-Key`` header.
+    Requests without the header are handled as before.
+    """
+    if inspect.iscoroutinefunction(view_method):
+        @wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            key, invalid = check_key(request)
+            if invalid is not None:
+                return invalid
+            if key is None:
+                return await view_method(self, request, *args, **kwargs)
+
+            record, response = await sync_to_async(claim)(key, request.path, request_fingerprint(request))
+            if record is None:
+                return response
+            try:
+                response = await view_method(self, request, *args, **kwargs)
+            except BaseException:
+                await sync_to_async(release)(record)
+                raise
+            await sync_to_async(complete)(record, response)
+            return response
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key, invalid = check_key(request)
+        if invalid is not None:
+            return invalid
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+
+        record, response = claim(key, request.path, request_fingerprint(request))
+        if record is None:
+            return response
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            release(record)
+            raise
+        complete(record, response)
+        return response
+    return wrapper
+
+
+def purge_expired_keys(batch_size=1000):
+    """
+    Deletes expired keys in batches of ``batch_size``. Returns the number deleted.
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids, expires_at__lte=timezone.now()).delete()[0]
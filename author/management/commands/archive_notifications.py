@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from author.archive import archivable, archive_batch, get_checkpoint, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves notifications older than the retention window to the archive table in "
+        "small batches, one short transaction each. An interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Retention window in days (default: NOTIFICATION_RETENTION_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Rows moved per transaction (default: NOTIFICATION_ARCHIVE_BATCH_SIZE).")
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches, to leave room for live traffic.")
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help="Stop after this many batches; the next run continues from the checkpoint.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Abandon an unfinished run and start over with a new cutoff.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many notifications would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['days'])
+        batch_size = options['batch_size'] or getattr(settings, 'NOTIFICATION_ARCHIVE_BATCH_SIZE', 500)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"{archivable(cutoff).count()} notification(s) scheduled or rejected before {cutoff} would be archived"
+            )
+            return
+
+        checkpoint = get_checkpoint(cutoff, restart=options['restart'])
+        if checkpoint.last_id:
+            self.stdout.write(
+                f"Resuming the run before {checkpoint.cutoff} after id {checkpoint.last_id} "
+                f"({checkpoint.archived} already archived)"
+            )
+        remaining = archivable(checkpoint.cutoff).filter(id__gt=checkpoint.last_id).count()
+        total = checkpoint.archived + remaining
+
+        batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive_batch(checkpoint, batch_size)
+            if not moved:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Archive complete: {checkpoint.archived} notification(s) archived before {checkpoint.cutoff}"
+                ))
+                return
+            batches += 1
+            self.stdout.write(f"Archived {checkpoint.archived}/{total} (last id {checkpoint.last_id})")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(
+            f"Stopped after {batches} batch(es); run the command again to continue after id {checkpoint.last_id}"
+        )
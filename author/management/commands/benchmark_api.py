@@ -0,0 +1,125 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+
+from author.benchmarks import (
+    benchmark_admin_changelist, benchmark_slot_checks, compare_payloads, compare_search, compare_serialization,
+    run_benchmarks, seed_notifications,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every notification endpoint against a throwaway test database seeded "
+        "with --rows notifications and writes latency percentiles, throughput and query "
+        "counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000,
+                            help="Number of notifications to seed (e.g. 10000 to 1000000).")
+        parser.add_argument('--iterations', type=int, default=50,
+                            help="Requests per scenario.")
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Only run the named scenario (repeatable).")
+        parser.add_argument('--output', default='bench_output.json',
+                            help="Where to write the JSON results.")
+        parser.add_argument('--compare-search', action='store_true',
+                            help="Also time icontains against the indexed prefix and full-text searches.")
+        parser.add_argument('--admin', action='store_true',
+                            help="Also time the admin changelist pages.")
+        parser.add_argument('--compare-payloads', action='store_true',
+                            help="Also measure list page sizes and latency with ?fields= and compression.")
+        parser.add_argument('--slot-checks', action='store_true',
+                            help="Also time the overlap check of new bookings.")
+        parser.add_argument('--compare-serialization', action='store_true',
+                            help="Also time the serializer against the fast list serialization path.")
+        parser.add_argument('--enforce-budgets', action='store_true',
+                            help="Exit with an error if a route runs more queries than its budget.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            started = time.perf_counter()
+            seed_notifications(options['rows'])
+            self.stdout.write(f"Seeded {options['rows']} notifications in {time.perf_counter() - started:.1f}s")
+
+            results = run_benchmarks(options['iterations'], only=options['scenarios'])
+            search_results = compare_search(options['iterations']) if options['compare_search'] else {}
+            admin_results = benchmark_admin_changelist(options['iterations']) if options['admin'] else {}
+            payload_results = compare_payloads(options['iterations']) if options['compare_payloads'] else {}
+            slot_results = benchmark_slot_checks(options['iterations']) if options['slot_checks'] else {}
+            serialization_results = (
+                compare_serialization(options['iterations']) if options['compare_serialization'] else {}
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'rows': options['rows'],
+                'iterations': options['iterations'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        if search_results:
+            report['search'] = search_results
+        if admin_results:
+            report['admin'] = admin_results
+        if payload_results:
+            report['payloads'] = payload_results
+        if slot_results:
+            report['slot_checks'] = slot_results
+        if serialization_results:
+            report['serialization'] = serialization_results
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:32} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"p99 {result['p99_ms']:8.2f}ms  {result['throughput_rps']:8.1f} req/s  "
+                f"{result['queries_per_request']:5.2f} queries (budget {result['query_budget']})"
+            )
+        for name, result in search_results.items():
+            self.stdout.write(
+                f"search {name:25} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['rows']:4} rows"
+            )
+        for name, result in admin_results.items():
+            self.stdout.write(
+                f"admin {name:26} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['queries_per_request']:5.2f} queries"
+            )
+        for name, result in payload_results.items():
+            self.stdout.write(
+                f"payload {name:24} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['bytes']:8} bytes"
+            )
+        for name, result in slot_results.items():
+            self.stdout.write(
+                f"slot {name:27} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{'taken' if result['taken'] else 'free'}"
+            )
+        for name, result in serialization_results.items():
+            self.stdout.write(
+                f"serialize {name:22} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['bytes']:8} bytes"
+            )
+        self.stdout.write(f"Results written to {options['output']}")
+
+        over_budget = [name for name, result in results.items() if not result['within_budget']]
+        if over_budget and options['enforce_budgets']:
+            raise CommandError(f"Query budget exceeded by: {', '.join(over_budget)}")
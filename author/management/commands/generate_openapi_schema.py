@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from author.docs import generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the OpenAPI schema of the API to a file, to be served by /swagger/schema.json "
+        "without generating it per request. Run it at build or deploy time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help="File to write (default: OPENAPI_SCHEMA_PATH).")
+        parser.add_argument('--format', choices=['json', 'yaml'], default=None,
+                            help="Output format (default: from the file extension, else json).")
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.OPENAPI_SCHEMA_PATH
+        schema_format = options['format'] or ('yaml' if output.endswith(('.yaml', '.yml')) else 'json')
+
+        content = generate_schema(schema_format)
+        with open(output, 'wb') as schema:
+            schema.write(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote the {schema_format} API schema to {output}"))
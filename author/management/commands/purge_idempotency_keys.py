@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from author.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Deletes expired Idempotency-Key records. Run it periodically, e.g. hourly from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Maximum number of keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency key(s)"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from author.summary import rebuild_summary, summary_mismatches
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-day notification counts (DailyStatusCount) from a GROUP BY over "
+        "the notifications. With --check, only compares the two and fails on differences."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Report days whose counts differ from the notifications, change nothing.")
+        parser.add_argument('--database', default=None,
+                            help="Database alias (default: the one the router picks for writes).")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = summary_mismatches(using=options['database'])
+            for day, status, summary, live in mismatches:
+                self.stdout.write(f"{day} {status}: summary {summary}, notifications {live}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} count(s) differ, run rebuild_daily_summary to fix them")
+            self.stdout.write(self.style.SUCCESS("The daily summary matches the notifications"))
+            return
+
+        rows = rebuild_summary(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f"Daily summary rebuilt: {rows} (day, status) count(s)"))
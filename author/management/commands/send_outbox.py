@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from author.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Sends queued emails from the outbox in batches over one mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Maximum number of emails sent per batch.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the outbox instead of exiting once it is empty.")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to wait between polls when the outbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'dead': 0}
+        while True:
+            counts = drain_outbox(batch_size=options['batch_size'])
+            for key, value in counts.items():
+                totals[key] += value
+
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retried']}, dead {counts['dead']}"
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {totals['sent']} sent, {totals['retried']} retrying, {totals['dead']} dead"
+        ))
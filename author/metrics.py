@@ -0,0 +1,98 @@
+"""
+In-process request metrics, filled by ``PerformanceMiddleware`` and exposed in the
+Prometheus text format by ``metrics_view``. Every worker process keeps its own
+numbers; the scraper sums them across processes.
+"""
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+# Upper bounds of the histogram buckets, per metric
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+METRICS = {
+    'http_request_duration_seconds': ('Wall time of the request', SECONDS_BUCKETS),
+    'http_request_db_queries': ('Database queries run by the request', QUERY_BUCKETS),
+    'http_request_db_duration_seconds': ('Time spent in database queries', SECONDS_BUCKETS),
+    'http_request_render_duration_seconds': ('Time spent serializing the response', SECONDS_BUCKETS),
+    'http_response_size_bytes': ('Size of the response body', BYTES_BUCKETS),
+}
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Histograms per metric and view name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, view, values):
+        """
+        Records one request. ``values`` maps metric names to the measured value; a
+        metric that was not measured is left out.
+        """
+        with self._lock:
+            for metric, value in values.items():
+                histogram = self._histograms.get((metric, view))
+                if histogram is None:
+                    histogram = self._histograms[(metric, view)] = Histogram(METRICS[metric][1])
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """
+        Renders every histogram in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for metric, (description, buckets) in METRICS.items():
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} histogram')
+                for (name, view), histogram in sorted(self._histograms.items()):
+                    if name != metric:
+                        continue
+                    label = f'view="{view}"'
+                    cumulative = 0
+                    for bound, count in zip((*buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{{label}}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """
+    Exposes the metrics of this process to the PERFORMANCE_METRICS_ALLOWED_IPS, which
+    is nobody until the setting lists the scraper's address.
+    """
+    allowed = getattr(settings, 'PERFORMANCE_METRICS_ALLOWED_IPS', [])
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
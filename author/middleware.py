@@ -0,0 +1,331 @@
+import random
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+from .metrics import registry
+from .routers import use_primary
+
+
+class QueryTimer:
+    """
+    ``execute_wrapper`` that counts queries and adds up the time spent running them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# QueryTimer of the request being measured. Context variables follow the request into
+# the threads sync_to_async runs the ORM in, which have database connections of their own.
+_query_timer = ContextVar('query_timer', default=None)
+
+
+def time_queries(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` installed on every connection (see author.signals), that hands
+    queries to the QueryTimer of the current request, if any.
+    """
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@contextmanager
+def measure_queries(timer):
+    token = _query_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _query_timer.reset(token)
+
+
+class PerformanceMiddleware:
+    """
+    Measures wall time, database queries and time, serialization time and response
+    size per view, for a PERFORMANCE_SAMPLE_RATE share of the requests.
+
+    Sampled requests are added to the histograms served by ``metrics_view``, and with
+    PERFORMANCE_SERVER_TIMING their responses get a ``Server-Timing`` header (which shows
+    every client the timings and query counts). Requests that are not sampled only cost
+    one call to ``random()``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        request._perf_render = None
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with measure_queries(timer):
+            response = self.get_response(request)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        request._perf_render = None
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with measure_queries(timer):
+            response = await self.get_response(request)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook, time the rendering
+        if hasattr(request, '_perf_render'):
+            request._perf_render_start = time.perf_counter()
+
+            def rendered(response):
+                request._perf_render = time.perf_counter() - request._perf_render_start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def sampled(self):
+        rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 1.0)
+        return rate >= 1 or random.random() < rate
+
+    def finish(self, request, response, timer, duration):
+        view = getattr(request.resolver_match, 'view_name', None) or 'unresolved'
+        render = getattr(request, '_perf_render', None)
+        values = {
+            'http_request_duration_seconds': duration,
+            'http_request_db_queries': timer.count,
+            'http_request_db_duration_seconds': timer.duration,
+        }
+        timings = [
+            f'app;dur={duration * 1000:.2f}',
+            f'db;dur={timer.duration * 1000:.2f};desc="{timer.count} queries"',
+        ]
+        if render:
+            values['http_request_render_duration_seconds'] = render
+            timings.append(f'render;dur={render * 1000:.2f}')
+        if not response.streaming:
+            values['http_response_size_bytes'] = len(response.content)
+
+        registry.observe(view, values)
+        if getattr(settings, 'PERFORMANCE_SERVER_TIMING', False):
+            response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keeps clients reading their own writes when reads go to replicas.
+
+    Requests with an unsafe method run entirely against the primary, so the reads
+    that decide a write are never stale. They also set a short-lived cookie that
+    pins the client's following requests to the primary for REPLICA_PIN_SECONDS,
+    long enough for the replicas to catch up.
+    """
+    cookie_name = 'pin_primary'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.pinned(request):
+            return self.get_response(request)
+        with use_primary():
+            response = self.get_response(request)
+        return self.set_pin(request, response)
+
+    async def __acall__(self, request):
+        if not self.pinned(request):
+            return await self.get_response(request)
+        with use_primary():
+            response = await self.get_response(request)
+        return self.set_pin(request, response)
+
+    def pinned(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or self.cookie_name in request.COOKIES
+
+    def set_pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                self.cookie_name,
+                '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+
+class BrotliCompressor:
+    """
+    ``brotli.Compressor`` with the ``compress()``/``flush()`` interface of zlib's.
+    """
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def gzip_compressor():
+    # wbits 31 writes a gzip header and trailer around the deflate stream
+    return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+
+def zstd_compressor():
+    return zstandard.ZstdCompressor(level=3).compressobj()
+
+
+# Content codings by preference, with a factory for their compressors
+ENCODINGS = {}
+if brotli is not None:
+    ENCODINGS['br'] = BrotliCompressor
+if zstandard is not None:
+    ENCODINGS['zstd'] = zstd_compressor
+ENCODINGS['gzip'] = gzip_compressor
+
+
+def choose_encoding(accept_encoding):
+    """
+    Picks the preferred coding of ENCODINGS that an ``Accept-Encoding`` header allows,
+    or None. Codings with ``q=0`` are refused, ``*`` stands for any other coding.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    for name in ENCODINGS:
+        if weights.get(name, weights.get('*', 0.0)) > 0:
+            return name
+    return None
+
+
+def compress_stream(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def acompress_stream(chunks, compressor):
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Only API payloads are compressed. HTML pages (the admin) carry CSRF tokens next to
+# reflected input, which compression would expose to BREACH.
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'application/x-ndjson')
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and NDJSON responses with the first coding of ENCODINGS the client
+    accepts: brotli or zstd when their packages are installed, gzip otherwise.
+
+    Responses under RESPONSE_COMPRESSION_MIN_SIZE bytes are sent as they are, for them
+    compressing costs more time than it saves bytes. Streaming responses are compressed
+    chunk by chunk. Like Django's GZipMiddleware, strong ETags are made weak, as the
+    compressed bytes differ from the uncompressed ones.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        min_size = getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_CONTENT_TYPES:
+            return response
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressor = ENCODINGS[encoding]()
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(response.streaming_content, compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            content = compressor.compress(response.content) + compressor.flush()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+def reserve_active_slots(apps, schema_editor):
+    """
+    Gives the oldest pending/accepted notification of every time slot its reservation.
+    Duplicates that slipped through the old check keep a NULL slot.
+    """
+    Notification = apps.get_model('author', 'Notification')
+    db_alias = schema_editor.connection.alias
+    reserved = set()
+    active = Notification.objects.using(db_alias).filter(status__in=['accepted', 'pending']).order_by('id')
+    for pk, scheduled_date in active.values_list('id', 'scheduled_date').iterator():
+        if scheduled_date in reserved:
+            continue
+        reserved.add(scheduled_date)
+        Notification.objects.using(db_alias).filter(pk=pk).update(active_slot=scheduled_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0007_remove_notification_verification_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='active_slot',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(reserve_active_slots, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='active_slot',
+            field=models.DateTimeField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
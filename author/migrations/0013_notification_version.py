@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0012_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:17
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# The SQL is a copy of author.search at the time of this migration, so later changes
+# to that module do not change what this migration does. The post_migrate handler in
+# author.signals installs the current version.
+SQLITE_FTS_TRIGGERS = {
+    'author_notification_fts_insert': (
+        "AFTER INSERT ON author_notification BEGIN "
+        "INSERT INTO author_notification_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+    ),
+    'author_notification_fts_delete': (
+        "AFTER DELETE ON author_notification BEGIN "
+        "INSERT INTO author_notification_fts(author_notification_fts, rowid, name, email) "
+        "VALUES ('delete', old.id, old.name, old.email); END"
+    ),
+    'author_notification_fts_update': (
+        "AFTER UPDATE OF name, email ON author_notification BEGIN "
+        "INSERT INTO author_notification_fts(author_notification_fts, rowid, name, email) "
+        "VALUES ('delete', old.id, old.name, old.email); "
+        "INSERT INTO author_notification_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+    ),
+}
+
+
+def create_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('ALTER TABLE author_notification ADD FULLTEXT INDEX notification_search_ft (name, email)')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS author_notification_fts USING fts5("
+                "name, email, content='author_notification', content_rowid='id')"
+            )
+            for name, sql in SQLITE_FTS_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {sql}')
+            cursor.execute("INSERT INTO author_notification_fts(author_notification_fts) VALUES ('rebuild')")
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('ALTER TABLE author_notification DROP INDEX notification_search_ft')
+        elif connection.vendor == 'sqlite':
+            for name in SQLITE_FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP TABLE IF EXISTS author_notification_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0013_notification_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='search_email',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='search_name',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=models.CharField(max_length=100)),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['search_name'], name='notification_search_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['search_email'], name='notification_search_email_idx'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.1.3 on 2026-10-16 22:47
+
+from datetime import timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+# The SQL is a copy of author.summary at the time of this migration, so later changes
+# to that module do not change what this migration does. The post_migrate handler in
+# author.signals installs the current version.
+SUMMARY_TRIGGERS = {
+    'sqlite': {
+        'author_summary_insert': (
+            "AFTER INSERT ON author_notification BEGIN "
+            "INSERT INTO author_dailystatuscount(day, status, total) VALUES (date(new.scheduled_date), new.status, 1) "
+            "ON CONFLICT(day, status) DO UPDATE SET total = total + 1; END"
+        ),
+        'author_summary_delete': (
+            "AFTER DELETE ON author_notification BEGIN "
+            "UPDATE author_dailystatuscount SET total = total - 1 "
+            "WHERE day = date(old.scheduled_date) AND status = old.status; END"
+        ),
+        'author_summary_update': (
+            "AFTER UPDATE OF status, scheduled_date ON author_notification "
+            "WHEN old.status IS NOT new.status OR date(old.scheduled_date) IS NOT date(new.scheduled_date) BEGIN "
+            "UPDATE author_dailystatuscount SET total = total - 1 "
+            "WHERE day = date(old.scheduled_date) AND status = old.status; "
+            "INSERT INTO author_dailystatuscount(day, status, total) VALUES (date(new.scheduled_date), new.status, 1) "
+            "ON CONFLICT(day, status) DO UPDATE SET total = total + 1; END"
+        ),
+    },
+    'mysql': {
+        'author_summary_insert': (
+            "AFTER INSERT ON author_notification FOR EACH ROW "
+            "INSERT INTO author_dailystatuscount (day, status, total) VALUES (DATE(NEW.scheduled_date), NEW.status, 1) "
+            "ON DUPLICATE KEY UPDATE total = total + 1"
+        ),
+        'author_summary_delete': (
+            "AFTER DELETE ON author_notification FOR EACH ROW "
+            "UPDATE author_dailystatuscount SET total = total - 1 "
+            "WHERE day = DATE(OLD.scheduled_date) AND status = OLD.status"
+        ),
+        'author_summary_update': (
+            "AFTER UPDATE ON author_notification FOR EACH ROW BEGIN "
+            "IF OLD.status <> NEW.status OR DATE(OLD.scheduled_date) <> DATE(NEW.scheduled_date) THEN "
+            "UPDATE author_dailystatuscount SET total = total - 1 "
+            "WHERE day = DATE(OLD.scheduled_date) AND status = OLD.status; "
+            "INSERT INTO author_dailystatuscount (day, status, total) VALUES (DATE(NEW.scheduled_date), NEW.status, 1) "
+            "ON DUPLICATE KEY UPDATE total = total + 1; "
+            "END IF; END"
+        ),
+    },
+}
+
+
+def create_summary_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    triggers = SUMMARY_TRIGGERS.get(connection.vendor)
+    if triggers is None:
+        return
+    with connection.cursor() as cursor:
+        for name, sql in triggers.items():
+            cursor.execute(f'CREATE TRIGGER {name} {sql}')
+
+    # Count the notifications that exist already
+    Notification = apps.get_model('author', 'Notification')
+    DailyStatusCount = apps.get_model('author', 'DailyStatusCount')
+    using = connection.alias
+    counts = (
+        Notification.objects.using(using)
+        .annotate(day=TruncDate('scheduled_date', tzinfo=timezone.utc))
+        .values_list('day', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    DailyStatusCount.objects.using(using).bulk_create(
+        DailyStatusCount(day=day, status=status, total=total) for day, status, total in counts
+    )
+
+
+def drop_summary_triggers(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for name in SUMMARY_TRIGGERS.get(schema_editor.connection.vendor, {}):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0015_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], max_length=10)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='daily_status_unique')],
+            },
+        ),
+        migrations.RunPython(create_summary_triggers, drop_summary_triggers),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:02
+
+from datetime import timedelta
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_active_end(apps, schema_editor):
+    # Existing bookings get the default duration
+    Notification = apps.get_model('author', 'Notification')
+    Notification.objects.exclude(active_slot=None).update(active_end=F('active_slot') + timedelta(minutes=30))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0016_dailystatuscount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='active_end',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=30, validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(1440)]),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=30),
+        ),
+        migrations.RunPython(set_active_end, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['active_slot', 'active_end'], name='notification_active_range_idx'),
+        ),
+    ]
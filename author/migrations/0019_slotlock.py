@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-16 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0018_emailoutbox_sending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+            ],
+        ),
+    ]
@@ -1,4 +1,231 @@
-from django.db import models
+from datetime import timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import IntegrityError, OperationalError, models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .cache import notifications_changed
+
+
+class SlotTaken(IntegrityError):
+    """
+    Raised when a booking would overlap the slot of a pending or accepted notification.
+    An IntegrityError, like the one the unique active_slot index raises for two bookings
+    starting at the same time, so callers handle both alike.
+    """
+
+
+class SlotBusy(IntegrityError):
+    """
+    Raised when a booking kept deadlocking with concurrent bookings, see run_booking.
+    The client should retry.
+    """
+
+
+# Attempts run_booking makes when the database aborts a booking to break a deadlock
+BOOKING_ATTEMPTS = 3
+# MySQL errors of a transaction that lost a lock conflict: deadlock, lock wait timeout
+LOCK_CONFLICT_ERRORS = (1213, 1205)
+# SQLite reports a lock it could not get by message: "database is locked", "database
+# table is locked"
+SQLITE_LOCK_CONFLICT = 'is locked'
+# Lock rows locked per query, below SQLite's limit on query parameters
+SLOT_LOCK_BATCH = 500
+
+
+def slot_days(start, end):
+    """
+    The UTC days that the slot ``[start, end)`` touches.
+    """
+    day = start.astimezone(dt_timezone.utc).date()
+    last = (end - timedelta(microseconds=1)).astimezone(dt_timezone.utc).date()
+    days = []
+    while day <= last:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def lock_slot_days(slots, using=None):
+    """
+    Locks the SlotLock rows of every day the ``(start, end)`` slots touch, creating the
+    missing ones. Two overlapping bookings share an instant, so they share the lock of
+    its day and run one after the other whatever the isolation level. Rows are locked in
+    day order by a no-op UPDATE, a write from the first statement on, so SQLite takes its
+    write lock before the booking reads anything; only the first booking of a day, which
+    has to insert the lock row, can deadlock with another one, see run_booking.
+    """
+    days = sorted({day for start, end in slots for day in slot_days(start, end)})
+    locks = SlotLock.objects.using(using).order_by('day')
+
+    def lock():
+        return sum(
+            locks.filter(day__in=days[offset:offset + SLOT_LOCK_BATCH]).update(day=F('day'))
+            for offset in range(0, len(days), SLOT_LOCK_BATCH)
+        )
+
+    if lock() < len(days):
+        # A concurrent first booking may insert the same rows: skip them, then lock them
+        SlotLock.objects.using(using).bulk_create(
+            [SlotLock(day=day) for day in days], batch_size=SLOT_LOCK_BATCH, ignore_conflicts=True
+        )
+        lock()
+
+
+def is_lock_conflict(exc):
+    if not exc.args:
+        return False
+    code = exc.args[0]
+    return code in LOCK_CONFLICT_ERRORS or (isinstance(code, str) and SQLITE_LOCK_CONFLICT in code)
+
+
+def run_booking(func, using=None):
+    """
+    Runs ``func`` in a transaction, again when the database rolled it back to break a
+    deadlock or a lock wait timed out, and raises SlotBusy when that keeps happening.
+    Inside a caller's transaction the whole transaction was rolled back, so the error
+    is raised as it is.
+    """
+    for attempt in range(BOOKING_ATTEMPTS):
+        try:
+            with transaction.atomic(using=using):
+                return func()
+        except OperationalError as exc:
+            if not is_lock_conflict(exc) or transaction.get_connection(using).in_atomic_block:
+                raise
+            last_error = exc
+    raise SlotBusy() from last_error
+
+
+def overlap_condition(start, end):
+    """
+    Matches the pending and accepted notifications whose slot overlaps ``[start, end)``.
+    Slots are at most ``Notification.MAX_DURATION`` long, so only the ones starting less
+    than that before ``start`` can reach into it: the condition is one bounded range of
+    the (active_slot, active_end) index, whatever the size of the table.
+    """
+    return Q(
+        active_slot__gt=start - Notification.MAX_DURATION,
+        active_slot__lt=end,
+        active_end__gt=start
+    )
+
+
+class NotificationQuerySet(models.QuerySet):
+
+    def verified(self, is_verified=True):
+        """
+        Filters on ``is_verified`` as ``is_verified = %s``. A plain ``filter(is_verified=True)``
+        becomes a bare ``WHERE is_verified`` on SQLite, which cannot use an index.
+        """
+        return self.filter(is_verified=Value(bool(is_verified)))
+
+    def overlapping(self, start, end):
+        """
+        Pending and accepted notifications whose slot overlaps ``[start, end)``, see
+        overlap_condition.
+        """
+        return self.filter(overlap_condition(start, end))
+
+    def check_slot(self, start, end, exclude=None):
+        """
+        Raises SlotTaken when ``[start, end)`` overlaps the slot of another notification
+        than ``exclude``. Call it in the transaction that writes the booking, after
+        lock_slot_days: concurrent bookings that could overlap wait for that lock, and
+        the plain read that follows it sees what they committed (a MySQL snapshot starts
+        at the first plain read of a transaction).
+        """
+        taken = self.overlapping(start, end)
+        if exclude is not None:
+            taken = taken.exclude(pk=exclude)
+        if taken.exists():
+            raise SlotTaken(start, end)
+
+    def create_pending(self, **fields):
+        """
+        Creates a pending notification after checking, in the same transaction and under
+        the locks of its days, that its slot is free. Raises SlotTaken (or IntegrityError)
+        when it is not, and SlotBusy when concurrent bookings kept deadlocking it.
+        """
+        notification = self.model(**fields, status='pending')
+        start, end = notification.scheduled_date, notification.scheduled_end
+
+        def book():
+            lock_slot_days([(start, end)], using=self.db)
+            self.check_slot(start, end)
+            notification.save(force_insert=True, using=self.db)
+
+        run_booking(book, using=self.db)
+        return notification
+
+    async def acreate_pending(self, **fields):
+        return await sync_to_async(self.create_pending)(**fields)
+
+    def update_unverified(self, pk, changes, version=None):
+        """
+        Applies ``changes`` to notification ``pk`` with one conditional UPDATE, only while
+        it is unverified and, if ``version`` is given, still at that version. Returns the
+        number of rows updated (0 or 1); the caller works out why when it is 0.
+
+        A change of ``scheduled_date`` or ``duration_minutes`` first checks the new slot
+        against the other bookings, under the locks of its days like create_pending, and
+        raises SlotTaken when it overlaps one.
+        """
+        rows = self.filter(pk=pk, is_verified=False)
+        if version is not None:
+            rows = rows.filter(version=version)
+        moves = bool({'scheduled_date', 'duration_minutes'} & changes.keys())
+
+        def new_slot(current):
+            start = changes.get('scheduled_date', current['scheduled_date'])
+            return start, start + timedelta(minutes=changes.get('duration_minutes', current['duration_minutes']))
+
+        # Read before the transaction which days to lock: the notification row is only
+        # locked after the days, in the order bookings lock them
+        columns = ('scheduled_date', 'duration_minutes', 'status')
+        current = rows.values(*columns).first() if moves else None
+        if moves and current is None:
+            return 0
+
+        def update():
+            values = dict(changes)
+            if moves:
+                days = {*slot_days(*new_slot(current))}
+                lock_slot_days([new_slot(current)], using=self.db)
+                locked = rows.select_for_update().values(*columns).first()
+                if locked is None:
+                    return 0
+                start, end = new_slot(locked)
+                if not days.issuperset(slot_days(start, end)):
+                    # Moved meanwhile
+                    lock_slot_days([(start, end)], using=self.db)
+                if locked['status'] in Notification.ACTIVE_STATUSES:
+                    self.check_slot(start, end, exclude=pk)
+                values.setdefault('scheduled_date', locked['scheduled_date'])
+                values.setdefault('duration_minutes', locked['duration_minutes'])
+                # Move the reserved slot along, see Notification.save()
+                for column, value in (('active_slot', start), ('active_end', end)):
+                    values[column] = Case(
+                        When(status__in=Notification.ACTIVE_STATUSES, then=Value(value)),
+                        default=None,
+                        output_field=models.DateTimeField()
+                    )
+            return rows.update(**values, version=F('version') + 1, updated_at=timezone.now())
+
+        # Its own savepoint, so a taken slot doesn't break the caller's transaction
+        updated = run_booking(update, using=self.db)
+        if updated:
+            # update() does not send post_save
+            notifications_changed(using=self.db)
+        return updated
+
+    async def aupdate_unverified(self, pk, changes, version=None):
+        return await sync_to_async(self.update_unverified)(pk, changes, version)
+
 
 class Notification(models.Model):
     STATUS_CHOICES = [
@@ -6,9 +233,21 @@ class Notification(models.Model):
         ('accepted', 'Accepted'),
         ('rejected', 'Rejected'),
     ]
+    # Statuses that keep a time slot reserved
+    ACTIVE_STATUSES = ('accepted', 'pending')
+    DEFAULT_DURATION_MINUTES = 30
+    # Longest slot, which bounds the index range an overlap check scans
+    MAX_DURATION_MINUTES = 24 * 60
+    MAX_DURATION = timedelta(minutes=MAX_DURATION_MINUTES)
+
     name = models.CharField(max_length=100)
     email = models.EmailField()
     scheduled_date = models.DateTimeField()
+    # The slot is the half-open interval [scheduled_date, scheduled_date + duration)
+    duration_minutes = models.PositiveIntegerField(
+        default=DEFAULT_DURATION_MINUTES,
+        validators=[MinValueValidator(5), MaxValueValidator(MAX_DURATION_MINUTES)]
+    )
     is_verified = models.BooleanField(default=False)
     status = models.CharField(
         max_length=10,
@@ -16,7 +255,210 @@ class Notification(models.Model):
         default='pending'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set on every change, including queryset updates, for conditional GETs
+    updated_at = models.DateTimeField(auto_now=True)
+    # Copy of scheduled_date while the notification holds its slot, NULL otherwise.
+    # The unique index turns slot reservation into a single atomic insert.
+    active_slot = models.DateTimeField(null=True, blank=True, unique=True, editable=False)
+    # End of the slot while the notification holds it, NULL otherwise, for overlap checks
+    active_end = models.DateTimeField(null=True, blank=True, editable=False)
+    # Incremented by every write, for optimistic concurrency (If-Match on updates)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Lowercased name and email, kept up to date by the database, for indexed prefix
+    # search (see author.search)
+    search_name = models.GeneratedField(
+        expression=Lower('name'),
+        output_field=models.CharField(max_length=100),
+        db_persist=True
+    )
+    search_email = models.GeneratedField(
+        expression=Lower('email'),
+        output_field=models.CharField(max_length=254),
+        db_persist=True
+    )
+
+    objects = NotificationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the listing, see NotificationCursorPagination
+            models.Index(fields=['created_at', 'id'], name='notification_created_idx'),
+            # Listing filtered by ?verified= and the admin's is_verified filter
+            models.Index(fields=['is_verified', 'created_at', 'id'], name='notification_verified_idx'),
+            # The admin's status filter, and rejected notifications for the retention job
+            models.Index(fields=['status', 'created_at', 'id'], name='notification_status_idx'),
+            # Date ranges (export, archive cutoff, admin date drill-down), optionally by status
+            models.Index(fields=['scheduled_date', 'status'], name='notification_scheduled_idx'),
+            models.Index(fields=['search_name'], name='notification_search_name_idx'),
+            models.Index(fields=['search_email'], name='notification_search_email_idx'),
+            # Slot overlap checks, see overlap_condition
+            models.Index(fields=['active_slot', 'active_end'], name='notification_active_range_idx'),
+        ]
+
+    @property
+    def scheduled_end(self):
+        return self.scheduled_date + timedelta(minutes=self.duration_minutes)
+
+    def clean(self):
+        super().clean()
+        if self.status in self.ACTIVE_STATUSES and self.scheduled_date and self.duration_minutes:
+            taken = Notification.objects.overlapping(self.scheduled_date, self.scheduled_end).exclude(pk=self.pk)
+            if taken.exists():
+                raise ValidationError({'scheduled_date': 'This time slot is already taken or pending.'})
+
+    def save(self, *args, **kwargs):
+        active = self.status in self.ACTIVE_STATUSES
+        self.active_slot = self.scheduled_date if active else None
+        self.active_end = self.scheduled_end if active else None
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'version'}
+            if {'status', 'scheduled_date', 'duration_minutes'} & update_fields:
+                update_fields.update(('active_slot', 'active_end'))
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} - {self.scheduled_date}"
 
+
+class SlotLock(models.Model):
+    """
+    One row per UTC day that had a booking. Bookings lock the rows of the days their
+    slot touches while they check and reserve it, see lock_slot_days.
+    """
+    day = models.DateField(unique=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class DailyStatusCount(models.Model):
+    """
+    Number of notifications per scheduled day (UTC) and status. Database triggers keep it
+    up to date in the same transaction as every insert, update and delete of a
+    notification, see author/summary.py.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Notification.STATUS_CHOICES)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='daily_status_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.total}"
+
+
+class EmailOutbox(models.Model):
+    """
+    An email waiting to be sent by the ``send_outbox`` worker. Rows are written in the
+    same transaction as the change that triggers them, so a rolled back change never
+    sends mail and a committed change always does.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        # Claimed by a worker until next_attempt_at, see author.outbox.claim_batch
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+    notification = models.ForeignKey(
+        Notification,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='emails'
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+class NotificationArchive(models.Model):
+    """
+    A notification moved out of the live table by ``archive_notifications``. It keeps
+    the original id, so archived rows can still be looked up by the id clients know.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    email = models.EmailField()
+    scheduled_date = models.DateTimeField(db_index=True)
+    duration_minutes = models.PositiveIntegerField(default=Notification.DEFAULT_DURATION_MINUTES)
+    is_verified = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=Notification.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the archive listing, see NotificationCursorPagination
+            models.Index(fields=['created_at', 'id'], name='archive_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.scheduled_date} (archived)"
+
+
+class ArchiveCheckpoint(models.Model):
+    """
+    Progress of an archival run. The run walks the live table in id order, so an
+    interrupted run resumes after ``last_id`` with the same cutoff.
+    """
+    cutoff = models.DateTimeField()
+    last_id = models.BigIntegerField(default=0)
+    archived = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Archive run before {self.cutoff} ({self.archived} archived)"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response to a POST sent with an ``Idempotency-Key`` header, replayed when the
+    client retries with the same key. A row without a status code belongs to a request
+    that is still being processed.
+    """
+    key = models.CharField(max_length=255)
+    # Request path, so the same key can be used against different endpoints
+    scope = models.CharField(max_length=255)
+    # SHA-256 of the request method and body, a reused key must come with the same request
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.scope})"
@@ -0,0 +1,157 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, recipient, notification=None, from_email=None):
+    """
+    Queues an email for the outbox worker. Call it inside the transaction that makes
+    the change the email is about.
+    """
+    return EmailOutbox.objects.create(
+        notification=notification,
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+
+
+def enqueue_emails(messages):
+    """
+    Queues many emails with a single INSERT. ``messages`` is an iterable of
+    ``(subject, body, recipient, notification)`` tuples.
+    """
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            notification=notification,
+            subject=subject,
+            body=body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient,
+        )
+        for subject, body, recipient, notification in messages
+    ])
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: base delay, then twice that, four times that, ...
+    """
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Claims up to ``batch_size`` due emails in one short transaction: they move to
+    ``sending`` with a lease of ``EMAIL_OUTBOX_LEASE_SECONDS``. Emails whose lease ran
+    out, because their worker died while sending, are due again. Returns the claimed
+    entries and the lease end, which identifies this claim.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        entries = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for entry in entries:
+            entry.status = 'sending'
+            entry.next_attempt_at = lease
+        EmailOutbox.objects.bulk_update(entries, ['status', 'next_attempt_at'])
+    return entries, lease
+
+
+def send_batch(entries, connection):
+    """
+    Sends ``entries`` over one mail connection. Returns the errors by entry id.
+    """
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not open mail connection: {e}")
+        return {entry.pk: e for entry in entries}
+
+    errors = {}
+    try:
+        for entry in entries:
+            message = EmailMessage(
+                entry.subject,
+                entry.body,
+                entry.from_email,
+                [entry.recipient],
+                connection=connection,
+            )
+            try:
+                if not connection.send_messages([message]):
+                    raise RuntimeError('Mail backend did not accept the message')
+            except Exception as e:
+                errors[entry.pk] = e
+    finally:
+        connection.close()
+    return errors
+
+
+def drain_outbox(batch_size=100, connection=None):
+    """
+    Sends one batch of due emails over a single mail connection.
+
+    The batch is claimed in a short transaction (see claim_batch), sent with no
+    transaction open, and the results are written in a second short transaction, so no
+    row lock is held during SMTP round trips. Rows are claimed with ``SKIP LOCKED``
+    where the database supports it, so several workers can drain the outbox side by
+    side. Returns a dict with the number of emails sent, scheduled for a retry and
+    given up on.
+    """
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    counts = {'sent': 0, 'retried': 0, 'dead': 0}
+
+    entries, lease = claim_batch(batch_size)
+    if not entries:
+        return counts
+    errors = send_batch(entries, connection or get_connection())
+
+    with transaction.atomic():
+        # Skip emails whose lease ran out while sending, another worker claimed them
+        claimed = set(
+            EmailOutbox.objects.select_for_update()
+            .filter(pk__in=[entry.pk for entry in entries], status='sending', next_attempt_at=lease)
+            .values_list('pk', flat=True)
+        )
+        entries = [entry for entry in entries if entry.pk in claimed]
+
+        now = timezone.now()
+        for entry in entries:
+            entry.attempts += 1
+            error = errors.get(entry.pk)
+            if error is None:
+                entry.status = 'sent'
+                entry.sent_at = now
+                entry.last_error = ''
+                counts['sent'] += 1
+            elif entry.attempts >= max_attempts:
+                entry.status = 'dead'
+                entry.last_error = str(error)
+                counts['dead'] += 1
+                logger.error(f"Giving up on outbox email {entry.pk} after {entry.attempts} attempts: {error}")
+            else:
+                entry.status = 'pending'
+                entry.next_attempt_at = now + retry_delay(entry.attempts)
+                entry.last_error = str(error)
+                counts['retried'] += 1
+
+        EmailOutbox.objects.bulk_update(
+            entries, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    return counts
@@ -0,0 +1,120 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a client sends a cursor that cannot be decoded.
+    """
+
+
+def encode_cursor(created_at, pk, reverse=False):
+    """
+    Encodes a ``(created_at, id)`` position into an opaque, URL-safe token.
+    """
+    payload = json.dumps([created_at.isoformat(), pk, int(reverse)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a token produced by ``encode_cursor`` back into ``(created_at, id, reverse)``.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk, reverse = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_at)
+        if created_at is None or not isinstance(pk, int):
+            raise InvalidCursor(cursor)
+        return created_at, pk, bool(reverse)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class NotificationCursorPagination:
+    """
+    Keyset pagination over ``(created_at, id)``.
+
+    Each page is a single ``WHERE (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT n``
+    query, so the cost of a page does not depend on how deep the client has paged.
+    The view fetches the rows itself (sync or async), the paginator only builds the
+    window query and the next/previous cursors.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, request):
+        self.page_size = self.get_page_size(request)
+        self.position = None
+        self.reverse = False
+
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk, self.reverse = decode_cursor(cursor)
+            self.position = (created_at, pk)
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'NOTIFICATION_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'NOTIFICATION_MAX_PAGE_SIZE', 500)
+        try:
+            page_size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return default
+        if page_size <= 0:
+            return default
+        return min(page_size, maximum)
+
+    def get_window(self, queryset):
+        """
+        Returns the sliced queryset for the requested page (one row more than the page
+        size, so we know whether another page exists).
+        """
+        if self.position is not None:
+            created_at, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                )
+
+        if self.reverse:
+            queryset = queryset.order_by('-created_at', '-id')
+        else:
+            queryset = queryset.order_by('created_at', 'id')
+        return queryset[:self.page_size + 1]
+
+    def paginate(self, rows):
+        """
+        Trims the fetched window to the page size and works out the cursors.
+        Returns ``(rows, next_cursor, previous_cursor)``.
+        """
+        rows = list(rows)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            has_next, has_previous = self.position is not None, has_more
+        else:
+            has_next, has_previous = has_more, self.position is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(*self._position(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(*self._position(rows[0]), reverse=True)
+        return rows, next_cursor, previous_cursor
+
+    @staticmethod
+    def _position(row):
+        if isinstance(row, dict):
+            return row['created_at'], row['id']
+        return row.created_at, row.id
@@ -0,0 +1,53 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set while the current request must read from the primary database
+_use_primary = ContextVar('use_primary', default=False)
+
+
+@contextmanager
+def use_primary():
+    """
+    Sends every read in the block to the primary database.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def primary_pinned():
+    """
+    Whether the current reads go to the primary database, see ``use_primary``.
+    """
+    return _use_primary.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to ``default`` and spreads reads over the DATABASE_REPLICAS, unless
+    the current request is pinned to the primary (see ``ReplicaPinningMiddleware``).
+    Locking reads (``select_for_update``) count as writes in Django and always go to
+    the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or _use_primary.get():
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db == 'default'
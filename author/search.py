@@ -0,0 +1,220 @@
+"""
+Indexed search over notification names and email addresses.
+
+Two kinds of queries are supported:
+
+* prefix queries (``prefix=jo``) run against ``search_name`` and ``search_email``, the
+  lowercased copies of ``name`` and ``email``, as a range scan of their B-tree indexes;
+* token queries (``search=john example``) go to a full-text backend: every word has to
+  start a word of the name or email address. MySQL uses a FULLTEXT index and SQLite an
+  FTS5 table, both created by migration 0014. Other databases fall back to ``icontains``,
+  which scans the table.
+
+``NOTIFICATION_SEARCH_BACKEND`` names a backend class to use instead of picking one by
+database vendor.
+"""
+import re
+import sys
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# Longest prefix or token query accepted, the longest searched column is email (254)
+MAX_QUERY_LENGTH = 254
+MAX_TOKENS = 8
+WORD_RE = re.compile(r'\w+')
+
+SQLITE_FTS_TABLE = 'author_notification_fts'
+MYSQL_FULLTEXT_INDEX = 'notification_search_ft'
+
+
+SQLITE_FTS_TRIGGERS = {
+    f'{SQLITE_FTS_TABLE}_insert': (
+        f"AFTER INSERT ON author_notification BEGIN "
+        f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+    ),
+    f'{SQLITE_FTS_TABLE}_delete': (
+        f"AFTER DELETE ON author_notification BEGIN "
+        f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, email) "
+        f"VALUES ('delete', old.id, old.name, old.email); END"
+    ),
+    f'{SQLITE_FTS_TABLE}_update': (
+        f"AFTER UPDATE OF name, email ON author_notification BEGIN "
+        f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, email) "
+        f"VALUES ('delete', old.id, old.name, old.email); "
+        f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email); END"
+    ),
+}
+
+
+def install_fulltext_index(connection):
+    """
+    Creates the full-text index if it is missing: a FULLTEXT index on MySQL, an external
+    content FTS5 table kept in sync by triggers on SQLite. Called after every migrate once
+    migration 0014 (which creates the index) is applied, because SQLite drops the
+    triggers whenever a migration rebuilds the notification table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                "AND table_name = 'author_notification' AND index_name = %s",
+                [MYSQL_FULLTEXT_INDEX]
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f'ALTER TABLE author_notification ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (name, email)'
+                )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+                f"name, email, content='author_notification', content_rowid='id')"
+            )
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in SQLITE_FTS_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(f'CREATE TRIGGER {name} {SQLITE_FTS_TRIGGERS[name]}')
+            if missing:
+                # Rows may have changed while the triggers were gone
+                cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_fulltext_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'ALTER TABLE author_notification DROP INDEX {MYSQL_FULLTEXT_INDEX}')
+        elif connection.vendor == 'sqlite':
+            for name in SQLITE_FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+
+
+class InvalidSearch(ValueError):
+    """
+    Raised when a search or prefix query cannot be run.
+    """
+
+
+def tokenize(query):
+    """
+    Splits a token query into lowercase words, the way the full-text indexes split the
+    indexed columns.
+    """
+    if len(query) > MAX_QUERY_LENGTH:
+        raise InvalidSearch(query)
+    tokens = WORD_RE.findall(query.lower())
+    if not tokens or len(tokens) > MAX_TOKENS:
+        raise InvalidSearch(query)
+    return tokens
+
+
+def prefix_upper_bound(prefix):
+    """
+    The smallest string greater than every string starting with ``prefix``, or None for
+    a prefix made only of the last code point (U+10FFFF), which has no such bound.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates cannot be stored, the next character is U+E000
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def filter_prefix(queryset, prefix):
+    """
+    Notifications whose name or email address starts with ``prefix`` (any case). Written
+    as ``search_name >= 'jo' AND search_name < 'jp'`` rather than LIKE, because every
+    database turns a range into an index range scan.
+    """
+    prefix = prefix.strip().lower()
+    if not prefix or len(prefix) > MAX_QUERY_LENGTH:
+        raise InvalidSearch(prefix)
+    name, email = Q(search_name__gte=prefix), Q(search_email__gte=prefix)
+    upper = prefix_upper_bound(prefix)
+    if upper is not None:
+        name &= Q(search_name__lt=upper)
+        email &= Q(search_email__lt=upper)
+    return queryset.filter(name | email)
+
+
+class BasicSearchBackend:
+    """
+    Every token has to appear in the name or email address. Unindexed, for databases
+    without a full-text backend.
+    """
+
+    def filter(self, queryset, tokens):
+        for token in tokens:
+            queryset = queryset.filter(Q(name__icontains=token) | Q(email__icontains=token))
+        return queryset
+
+
+class MySQLFullTextSearchBackend:
+    """
+    ``MATCH (name, email) AGAINST ('+john* +example*' IN BOOLEAN MODE)`` on the FULLTEXT
+    index. InnoDB does not index words shorter than ``innodb_ft_min_token_size`` (3 by
+    default), so such tokens only narrow the results when the server indexes them.
+    """
+
+    def filter(self, queryset, tokens):
+        expression = ' '.join(f'+{token}*' for token in tokens)
+        table = connections[queryset.db].ops.quote_name(queryset.model._meta.db_table)
+        return queryset.filter(RawSQL(
+            f'MATCH ({table}.`name`, {table}.`email`) AGAINST (%s IN BOOLEAN MODE)',
+            [expression], output_field=BooleanField()
+        ))
+
+
+class SQLiteFTS5SearchBackend:
+    """
+    Looks the ids up in the ``author_notification_fts`` FTS5 table, which triggers keep
+    in sync with the notification table.
+    """
+
+    def filter(self, queryset, tokens):
+        expression = ' AND '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            [expression]
+        ))
+
+
+BACKENDS = {
+    'mysql': MySQLFullTextSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+
+def get_search_backend(using):
+    path = getattr(settings, 'NOTIFICATION_SEARCH_BACKEND', '')
+    if path:
+        return import_string(path)()
+    return BACKENDS.get(connections[using].vendor, BasicSearchBackend)()
+
+
+def filter_tokens(queryset, query):
+    """
+    Notifications matching every word of ``query``, see ``get_search_backend``.
+    """
+    return get_search_backend(queryset.db).filter(queryset, tokenize(query))
+
+
+def apply_search(queryset, query_params):
+    """
+    Applies the ``prefix`` and ``search`` query parameters of the list endpoint.
+    Raises InvalidSearch for a query that is empty or too long.
+    """
+    prefix = query_params.get('prefix')
+    if prefix is not None:
+        queryset = filter_prefix(queryset, prefix)
+    query = query_params.get('search')
+    if query is not None:
+        queryset = filter_tokens(queryset, query)
+    return queryset
@@ -1,14 +1,192 @@
+from datetime import time
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'name', 'email',  'scheduled_date', 'is_verified']
+        fields = ['id', 'name', 'email',  'scheduled_date', 'duration_minutes', 'is_verified']
         read_only_fields = ['is_verified']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        # ``fields`` limits the output to these fields, see parse_fields
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def to_representation(self, instance):
         """Custom representation of the notification"""
         representation = super().to_representation(instance)
-        representation['status'] = 'Verified' if instance.is_verified else 'Pending'
-        return representation
\ No newline at end of file
+        if self.selected_fields is None or 'status' in self.selected_fields:
+            representation['status'] = 'Verified' if instance.is_verified else 'Pending'
+        return representation
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the availability endpoint.
+    """
+    start = serializers.DateField()
+    end = serializers.DateField()
+    slot_minutes = serializers.IntegerField(min_value=5, max_value=24 * 60, default=30)
+    work_start = serializers.TimeField(default=time(9, 0))
+    work_end = serializers.TimeField(default=time(17, 0))
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        max_days = getattr(settings, 'NOTIFICATION_AVAILABILITY_MAX_DAYS', 62)
+        if (attrs['end'] - attrs['start']).days >= max_days:
+            raise serializers.ValidationError(f"The range may span at most {max_days} days.")
+        if attrs['work_end'] <= attrs['work_start']:
+            raise serializers.ValidationError("'work_end' must be after 'work_start'.")
+        return attrs
+
+
+class CalendarQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the calendar endpoint.
+    """
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        max_days = getattr(settings, 'NOTIFICATION_CALENDAR_MAX_DAYS', 366)
+        if (attrs['end'] - attrs['start']).days >= max_days:
+            raise serializers.ValidationError(f"The range may span at most {max_days} days.")
+        return attrs
+
+
+class BatchDecisionSerializer(serializers.Serializer):
+    """
+    Validates the body of the batch decision endpoint.
+    """
+    action = serializers.ChoiceField(choices=['accept', 'reject'])
+    # Ids are 64 bit, a larger one would overflow the query parameter
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1, max_value=2**63 - 1), allow_empty=False)
+
+    def validate_ids(self, value):
+        max_size = getattr(settings, 'NOTIFICATION_BATCH_DECISION_MAX', 1000)
+        if len(value) > max_size:
+            raise serializers.ValidationError(f'A batch may contain at most {max_size} notifications.')
+        return value
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the export endpoint.
+    """
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    verified = serializers.BooleanField(required=False)
+    status = serializers.ChoiceField(choices=Notification.STATUS_CHOICES, required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['end'] < attrs['start']:
+            raise serializers.ValidationError("'end' must not be before 'start'.")
+        return attrs
+
+
+# Columns needed by serialize_notification_rows (created_at for the list cursor)
+NOTIFICATION_COLUMNS = ('id', 'name', 'email', 'scheduled_date', 'duration_minutes', 'is_verified', 'created_at')
+
+# Fields of a serialized notification, in output order, and the columns each is built from
+NOTIFICATION_FIELDS = {
+    'id': ('id',),
+    'name': ('name',),
+    'email': ('email',),
+    'scheduled_date': ('scheduled_date',),
+    'duration_minutes': ('duration_minutes',),
+    'is_verified': ('is_verified',),
+    'status': ('is_verified',),
+}
+
+
+class InvalidFields(ValueError):
+    """
+    Raised when a ``fields`` query parameter names no field or an unknown one.
+    """
+
+
+def parse_fields(value):
+    """
+    Parses a ``fields`` query parameter (``fields=id,scheduled_date,status``) into the
+    selected field names, in output order. None when the parameter is absent, which
+    selects every field.
+    """
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(',')} - {''}
+    if not names or not names <= NOTIFICATION_FIELDS.keys():
+        raise InvalidFields(value)
+    return tuple(name for name in NOTIFICATION_FIELDS if name in names)
+
+
+def notification_columns(fields):
+    """
+    The columns to fetch for ``serialize_notification_rows(rows, fields)``. ``id`` and
+    ``created_at`` are always included, the list cursor is built from them.
+    """
+    if fields is None:
+        return NOTIFICATION_COLUMNS
+    columns = dict.fromkeys(['id', 'created_at'])
+    for name in fields:
+        columns.update(dict.fromkeys(NOTIFICATION_FIELDS[name]))
+    return tuple(columns)
+
+
+def format_datetime(value, tz):
+    """
+    Formats a datetime the way ``serializers.DateTimeField`` does with the default
+    ISO 8601 output format.
+    """
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+FIELD_VALUES = {
+    'id': lambda row, tz: row['id'],
+    'name': lambda row, tz: row['name'],
+    'email': lambda row, tz: row['email'],
+    'scheduled_date': lambda row, tz: format_datetime(row['scheduled_date'], tz),
+    'duration_minutes': lambda row, tz: row['duration_minutes'],
+    'is_verified': lambda row, tz: row['is_verified'],
+    'status': lambda row, tz: 'Verified' if row['is_verified'] else 'Pending',
+}
+
+
+def serialize_notification_rows(rows, fields=None):
+    """
+    Fast equivalent of ``NotificationSerializer(many=True).data`` for rows fetched with
+    ``values(*NOTIFICATION_COLUMNS)``. It builds the output dicts directly instead of
+    going through model instances and per-field serializer machinery.
+
+    With ``fields`` (see parse_fields) only those fields are output, and the rows only
+    need ``notification_columns(fields)``.
+    """
+    tz = timezone.get_current_timezone()
+    if fields is not None:
+        values = [(name, FIELD_VALUES[name]) for name in fields]
+        return [{name: value(row, tz) for name, value in values} for row in rows]
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'email': row['email'],
+            'scheduled_date': format_datetime(row['scheduled_date'], tz),
+            'duration_minutes': row['duration_minutes'],
+            'is_verified': row['is_verified'],
+            'status': 'Verified' if row['is_verified'] else 'Pending',
+        }
+        for row in rows
+    ]
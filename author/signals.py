@@ -0,0 +1,44 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .cache import notifications_changed
+from .middleware import time_queries
+from .models import Notification
+from .search import install_fulltext_index
+from .summary import install_summary_triggers
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """
+    Lets PerformanceMiddleware count the queries of every connection, including the
+    ones of the threads async views run the ORM in.
+    """
+    # Connections that reconnect (CONN_MAX_AGE) signal again
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_caches(sender, using, **kwargs):
+    notifications_changed(using=using)
+
+
+@receiver(post_migrate)
+def restore_triggers(sender, using, **kwargs):
+    """
+    Puts back the full-text index and summary triggers after a migration rebuilt the
+    notification table.
+    """
+    if sender.name != 'author':
+        return
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ('author', '0014_notification_search') in applied:
+        install_fulltext_index(connection)
+    if ('author', '0016_dailystatuscount') in applied:
+        install_summary_triggers(connection)
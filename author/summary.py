@@ -0,0 +1,170 @@
+"""
+Per-day notification counts by status, for dashboards.
+
+``DailyStatusCount`` holds one row per scheduled day and status. Triggers on the
+notification table add and subtract from it, so every write path (``save()``,
+``bulk_create()``, queryset ``update()`` and ``delete()``, raw SQL) updates it in the
+same transaction, without extra queries from the application. Days are UTC dates of
+``scheduled_date``, the way the database stores it.
+
+``rebuild_summary`` recomputes the table from a ``GROUP BY`` over the notifications and
+``summary_mismatches`` compares the two, see the ``rebuild_daily_summary`` command.
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from .models import DailyStatusCount, Notification
+
+SQLITE_SUMMARY_TRIGGERS = {
+    'author_summary_insert': (
+        "AFTER INSERT ON author_notification BEGIN "
+        "INSERT INTO author_dailystatuscount(day, status, total) VALUES (date(new.scheduled_date), new.status, 1) "
+        "ON CONFLICT(day, status) DO UPDATE SET total = total + 1; END"
+    ),
+    'author_summary_delete': (
+        "AFTER DELETE ON author_notification BEGIN "
+        "UPDATE author_dailystatuscount SET total = total - 1 "
+        "WHERE day = date(old.scheduled_date) AND status = old.status; END"
+    ),
+    'author_summary_update': (
+        "AFTER UPDATE OF status, scheduled_date ON author_notification "
+        "WHEN old.status IS NOT new.status OR date(old.scheduled_date) IS NOT date(new.scheduled_date) BEGIN "
+        "UPDATE author_dailystatuscount SET total = total - 1 "
+        "WHERE day = date(old.scheduled_date) AND status = old.status; "
+        "INSERT INTO author_dailystatuscount(day, status, total) VALUES (date(new.scheduled_date), new.status, 1) "
+        "ON CONFLICT(day, status) DO UPDATE SET total = total + 1; END"
+    ),
+}
+
+MYSQL_SUMMARY_TRIGGERS = {
+    'author_summary_insert': (
+        "AFTER INSERT ON author_notification FOR EACH ROW "
+        "INSERT INTO author_dailystatuscount (day, status, total) VALUES (DATE(NEW.scheduled_date), NEW.status, 1) "
+        "ON DUPLICATE KEY UPDATE total = total + 1"
+    ),
+    'author_summary_delete': (
+        "AFTER DELETE ON author_notification FOR EACH ROW "
+        "UPDATE author_dailystatuscount SET total = total - 1 "
+        "WHERE day = DATE(OLD.scheduled_date) AND status = OLD.status"
+    ),
+    'author_summary_update': (
+        "AFTER UPDATE ON author_notification FOR EACH ROW BEGIN "
+        "IF OLD.status <> NEW.status OR DATE(OLD.scheduled_date) <> DATE(NEW.scheduled_date) THEN "
+        "UPDATE author_dailystatuscount SET total = total - 1 "
+        "WHERE day = DATE(OLD.scheduled_date) AND status = OLD.status; "
+        "INSERT INTO author_dailystatuscount (day, status, total) VALUES (DATE(NEW.scheduled_date), NEW.status, 1) "
+        "ON DUPLICATE KEY UPDATE total = total + 1; "
+        "END IF; END"
+    ),
+}
+
+SUMMARY_TRIGGERS = {
+    'mysql': MYSQL_SUMMARY_TRIGGERS,
+    'sqlite': SQLITE_SUMMARY_TRIGGERS,
+}
+
+
+def existing_triggers(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute("SELECT trigger_name FROM information_schema.triggers WHERE trigger_schema = DATABASE()")
+        else:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def install_summary_triggers(connection):
+    """
+    Creates the summary triggers that are missing and rebuilds the summary if any were,
+    since notifications may have changed without them. Called after every migrate once
+    migration 0016 (which creates the triggers) is applied, because SQLite drops
+    triggers when a migration rebuilds the notification table.
+    """
+    triggers = SUMMARY_TRIGGERS.get(connection.vendor)
+    if triggers is None:
+        return
+    missing = [name for name in triggers if name not in existing_triggers(connection)]
+    with connection.cursor() as cursor:
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {triggers[name]}')
+    if missing:
+        rebuild_summary(using=connection.alias)
+
+
+def uninstall_summary_triggers(connection):
+    with connection.cursor() as cursor:
+        for name in SUMMARY_TRIGGERS.get(connection.vendor, {}):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def live_counts(using=None):
+    """
+    Counts per (day, status) computed from the notifications with a GROUP BY.
+    """
+    rows = (
+        Notification.objects.using(using)
+        .annotate(day=TruncDate('scheduled_date', tzinfo=dt_timezone.utc))
+        .values_list('day', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    return {(day, status): total for day, status, total in rows}
+
+
+def summary_counts(using=None):
+    rows = DailyStatusCount.objects.using(using).exclude(total=0).values_list('day', 'status', 'total')
+    return {(day, status): total for day, status, total in rows}
+
+
+def summary_mismatches(using=None):
+    """
+    Compares the summary with a live GROUP BY. Returns ``(day, status, summary, live)``
+    for every difference, sorted by day.
+    """
+    summary, live = summary_counts(using), live_counts(using)
+    return sorted(
+        (day, status, summary.get((day, status), 0), live.get((day, status), 0))
+        for day, status in summary.keys() | live.keys()
+        if summary.get((day, status), 0) != live.get((day, status), 0)
+    )
+
+
+def rebuild_summary(using=None):
+    """
+    Replaces the summary with a live GROUP BY in one transaction. Deleting comes first:
+    it locks the summary, so notifications written meanwhile wait for the rebuild and
+    then apply their change on top of it. Returns the number of summary rows written.
+    """
+    using = using or router.db_for_write(DailyStatusCount)
+    with transaction.atomic(using=using):
+        DailyStatusCount.objects.using(using).all().delete()
+        counts = live_counts(using)
+        DailyStatusCount.objects.using(using).bulk_create(
+            DailyStatusCount(day=day, status=status, total=total) for (day, status), total in counts.items()
+        )
+    return len(counts)
+
+
+def calendar(start, end, using=None):
+    """
+    Counts per status for every day from ``start`` to ``end`` (inclusive), read from the
+    summary with one range query. Days without notifications have zero counts.
+    """
+    counts = DailyStatusCount.objects.using(using).filter(day__gte=start, day__lte=end)
+    by_day = {}
+    for day, status, total in counts.values_list('day', 'status', 'total'):
+        by_day.setdefault(day, {})[status] = total
+
+    statuses = [status for status, _ in Notification.STATUS_CHOICES]
+    days = []
+    day = start
+    while day <= end:
+        totals = by_day.get(day, {})
+        entry = {'date': day.isoformat(), **{status: totals.get(status, 0) for status in statuses}}
+        entry['total'] = sum(entry[status] for status in statuses)
+        days.append(entry)
+        day += timedelta(days=1)
+    return days
@@ -1,3 +1,1881 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.models import F, Max, Min
+from django.http import HttpResponse, QueryDict
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import availability, docs, urls
+from .admin import NotificationAdmin
+from .benchmarks import (
+    QUERY_BUDGETS, benchmark_admin_changelist, benchmark_slot_checks, build_scenarios, compare_payloads, compare_search, compare_serialization, count_queries, percentile, run_benchmarks, seed_notifications,
+    summarize_timings,
+)
+from .cache import (
+    LAST_MODIFIED_KEY, bump_notifications_version, get_cached_list, get_notifications_version, list_etag,
+    read_caching_enabled,
+)
+from .changelist import ChangeListQuerySet
+from .metrics import registry
+from .middleware import ENCODINGS, ReplicaPinningMiddleware, choose_encoding
+from .models import (
+    ArchiveCheckpoint, DailyStatusCount, EmailOutbox, IdempotencyKey, Notification, NotificationArchive, SlotLock,
+)
+from .outbox import claim_batch, drain_outbox, enqueue_email
+from .pagination import NotificationCursorPagination, encode_cursor
+from .renderers import NotificationJSONRenderer
+from .routers import PrimaryReplicaRouter, use_primary
+from .search import (
+    BasicSearchBackend, MySQLFullTextSearchBackend, filter_prefix, install_fulltext_index, prefix_upper_bound,
+)
+from .summary import live_counts, summary_counts, summary_mismatches
+from .serializers import NOTIFICATION_COLUMNS, NotificationSerializer, parse_fields, serialize_notification_rows
+from .views import NotificationBulkCreateView
+
+
+def make_notifications(count, start=None, **kwargs):
+    """Creates ``count`` notifications one hour apart, starting tomorrow."""
+    start = start or timezone.now().replace(microsecond=0) + timedelta(days=1)
+    active = kwargs.get('status', 'pending') in Notification.ACTIVE_STATUSES
+    return Notification.objects.bulk_create([
+        Notification(
+            name=f'User {i}',
+            email=f'user{i}@example.com',
+            scheduled_date=start + timedelta(hours=i),
+            active_slot=start + timedelta(hours=i) if active else None,
+            active_end=start + timedelta(hours=i, minutes=Notification.DEFAULT_DURATION_MINUTES) if active else None,
+            **kwargs
+        )
+        for i in range(count)
+    ])
+
+
+@override_settings(NOTIFICATION_PAGE_SIZE=10, NOTIFICATION_MAX_PAGE_SIZE=25)
+class NotificationListPaginationTests(TestCase):
+    url = reverse('notification-list')
+
+    def setUp(self):
+        cache.clear()
+        make_notifications(35)
+        # Give half of the rows the same created_at so ties are broken by id
+        Notification.objects.filter(id__lte=Notification.objects.order_by('id')[17].id).update(
+            created_at=timezone.now()
+        )
+
+    def walk(self, params=None):
+        ids, url, params = [], self.url, dict(params or {})
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(n['id'] for n in response.json()['notifications'])
+            cursor = response.json()['next']
+            if cursor is None:
+                return ids
+            params['cursor'] = cursor
+
+    def test_pages_cover_every_row_once_in_keyset_order(self):
+        expected = list(Notification.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk(), expected)
+
+    def test_previous_cursor_returns_preceding_page(self):
+        first = self.client.get(self.url).json()
+        second = self.client.get(self.url, {'cursor': first['next']}).json()
+        self.assertIsNone(first['previous'])
+        back = self.client.get(self.url, {'cursor': second['previous']}).json()
+        self.assertEqual(back['notifications'], first['notifications'])
+
+    def test_page_size_is_configurable_and_capped(self):
+        response = self.client.get(self.url, {'page_size': 5})
+        self.assertEqual(len(response.json()['notifications']), 5)
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.json()['notifications']), 25)
+
+    def test_count_only_on_request(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertNotIn('count', response.json())
+        response = self.client.get(self.url, {'include_count': 'true'})
+        self.assertEqual(response.json()['count'], 35)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NotificationSlotReservationTests(TestCase):
+    url = reverse('notification-create')
+
+    def payload(self, **kwargs):
+        data = {
+            'name': 'Aya',
+            'email': 'aya@example.com',
+            'scheduled_date': '2030-01-01T10:00:00Z',
+        }
+        data.update(kwargs)
+        return data
+
+    def test_create_is_one_lookup_and_one_insert(self):
+        SlotLock.objects.create(day=date(2030, 1, 1))
+        # savepoint + day lock + overlap lookup + INSERT + release
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, self.payload())
+        self.assertEqual(response.status_code, 201)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.active_slot, notification.scheduled_date)
+        self.assertEqual(notification.active_end, notification.scheduled_date + timedelta(minutes=30))
+
+    def test_first_booking_of_a_day_creates_its_lock(self):
+        response = self.client.post(self.url, self.payload(scheduled_date='2030-01-01T23:45:00Z'))
+        self.assertEqual(response.status_code, 201)
+        # The slot runs past midnight
+        self.assertEqual(
+            list(SlotLock.objects.order_by('day').values_list('day', flat=True)),
+            [date(2030, 1, 1), date(2030, 1, 2)]
+        )
+        response = self.client.post(self.url, self.payload(scheduled_date='2030-01-02T00:00:00Z'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SlotLock.objects.count(), 2)
+
+
+    def test_taken_slot_is_rejected(self):
+        self.client.post(self.url, self.payload())
+        response = self.client.post(self.url, self.payload(name='Other'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_rejected_notification_releases_slot(self):
+        self.client.post(self.url, self.payload())
+        notification = Notification.objects.get()
+        notification.status = 'rejected'
+        notification.save()
+        self.assertIsNone(notification.active_slot)
+
+        response = self.client.post(self.url, self.payload(name='Other'))
+        self.assertEqual(response.status_code, 201)
+
+
+class NotificationSlotConcurrencyTests(TransactionTestCase):
+    workers = 8
+
+    def test_parallel_creates_for_one_slot(self):
+        barrier = threading.Barrier(self.workers)
+
+        def create(i):
+            barrier.wait()
+            try:
+                return Client().post(reverse('notification-create'), {
+                    'name': f'User {i}',
+                    'email': f'user{i}@example.com',
+                    'scheduled_date': '2030-01-01T10:00:00Z',
+                }).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            codes = list(pool.map(create, range(self.workers)))
+
+        # Exactly one booking exists and everybody else was told the slot is taken or busy,
+        # lock errors included
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(codes.count(201), 1, codes)
+        self.assertEqual(codes.count(400) + codes.count(409), self.workers - 1, codes)
+
+    def test_deadlocks_are_retried(self):
+        # MySQL rolls back one of two deadlocked transactions, the booking starts over
+        deadlock = OperationalError(1213, 'Deadlock found when trying to get lock; try restarting transaction')
+        url = reverse('notification-create')
+        data = {'name': 'Aya', 'email': 'aya@example.com', 'scheduled_date': '2030-01-01T10:00:00Z'}
+        with mock.patch('author.models.lock_slot_days', side_effect=[deadlock, None]):
+            self.assertEqual(self.client.post(url, data).status_code, 201)
+
+        data['scheduled_date'] = '2030-01-02T10:00:00Z'
+        with mock.patch('author.models.lock_slot_days', side_effect=deadlock):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_parallel_creates_for_overlapping_slots(self):
+        barrier = threading.Barrier(self.workers)
+
+        def create(i):
+            barrier.wait()
+            try:
+                # Starts one minute apart, every pair of 30 minute slots overlaps
+                return Client().post(reverse('notification-create'), {
+                    'name': f'User {i}',
+                    'email': f'user{i}@example.com',
+                    'scheduled_date': f'2030-01-01T10:{i:02d}:00Z',
+                }).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            codes = list(pool.map(create, range(self.workers)))
+
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(codes.count(201), 1, codes)
+        self.assertEqual(codes.count(400) + codes.count(409), self.workers - 1, codes)
+
+
+class NotificationBulkCreateTests(TestCase):
+    url = reverse('notification-bulk-create')
+
+    def item(self, hour, **kwargs):
+        data = {
+            'name': f'User {hour}',
+            'email': f'user{hour}@example.com',
+            'scheduled_date': f'2030-01-01T{hour:02d}:00:00Z',
+        }
+        data.update(kwargs)
+        return data
+
+    def post(self, items):
+        return self.client.post(self.url, items, content_type='application/json')
+
+    def test_batch_uses_constant_number_of_queries(self):
+        # 80 back to back slots, few enough for one INSERT within SQLite's 999 parameters
+        items = [
+            self.item(h, scheduled_date=f'2030-01-01T{h:02d}:{m:02d}:00Z', duration_minutes=5)
+            for h in range(7) for m in range(0, 60, 5)
+        ][:80]
+        SlotLock.objects.create(day=date(2030, 1, 1))
+        # savepoint, day lock, conflict lookup, INSERT, release
+        with self.assertNumQueries(5):
+            response = self.post(items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 80)
+        self.assertEqual(Notification.objects.exclude(active_slot=None).count(), 80)
+
+    def test_conflicts_in_batch_and_database(self):
+        self.client.post(reverse('notification-create'), self.item(9))
+        response = self.post([self.item(9), self.item(10), self.item(10, name='Twin'), self.item(11)])
+
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        self.assertEqual(
+            [r['result'] for r in results],
+            ['conflict', 'created', 'conflict', 'created']
+        )
+        self.assertEqual(
+            set(Notification.objects.values_list('name', flat=True)),
+            {'User 9', 'User 10', 'User 11'}
+        )
+        self.assertEqual(results[1]['id'], Notification.objects.get(name='User 10').id)
+
+    def test_overlapping_slots_in_batch_and_database(self):
+        # 09:00-10:00 is booked
+        self.client.post(reverse('notification-create'), self.item(9, duration_minutes=60))
+        response = self.post([
+            self.item(8, scheduled_date='2030-01-01T08:30:00Z'),
+            self.item(8, scheduled_date='2030-01-01T08:45:00Z', name='Overlaps 09:00'),
+            self.item(10, duration_minutes=90),
+            self.item(11, scheduled_date='2030-01-01T11:15:00Z', name='Overlaps 10:00'),
+            self.item(11, scheduled_date='2030-01-01T11:30:00Z'),
+        ])
+        self.assertEqual(
+            [r['result'] for r in response.json()['results']],
+            ['created', 'conflict', 'created', 'conflict', 'created']
+        )
+        self.assertFalse(Notification.objects.filter(name__startswith='Overlaps').exists())
+
+    def test_lost_races_are_a_conflict(self):
+        with mock.patch.object(NotificationBulkCreateView, 'create_batch', side_effect=IntegrityError) as create:
+            response = self.post([self.item(9)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(create.call_count, NotificationBulkCreateView.max_attempts)
+
+    def test_ids_are_looked_up_when_the_insert_returns_none(self):
+        def insert_without_ids(objs, *args, **kwargs):
+            for notification in objs:
+                notification.save()
+                notification.pk = None
+            return objs
+
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=insert_without_ids):
+            results = self.post([self.item(9), self.item(10)]).json()['results']
+        self.assertEqual(
+            [result['id'] for result in results],
+            [Notification.objects.get(name=f'User {hour}').pk for hour in (9, 10)]
+        )
+
+    def test_all_conflicts(self):
+        self.client.post(reverse('notification-create'), self.item(9))
+        response = self.post([self.item(9)])
+        self.assertEqual(response.status_code, 409)
+
+    def test_invalid_item_rejects_batch(self):
+        response = self.post([self.item(9), self.item(10, email='not-an-email')])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Notification.objects.exists())
+
+    @override_settings(NOTIFICATION_BULK_CREATE_MAX=2)
+    def test_batch_size_limit(self):
+        response = self.post([self.item(h) for h in range(3)])
+        self.assertEqual(response.status_code, 400)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP server unavailable')
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class TransactionCheckingEmailBackend(locmem.EmailBackend):
+    atomic_depths = []
+
+    def send_messages(self, messages):
+        TransactionCheckingEmailBackend.atomic_depths.append(len(connection.atomic_blocks))
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+
+    def setUp(self):
+        self.notification = make_notifications(1)[0]
+        self.admin = NotificationAdmin(Notification, admin.site)
+
+    def decide(self, status, is_verified):
+        self.notification.status = status
+        self.notification.is_verified = is_verified
+        self.admin.save_model(RequestFactory().post('/'), self.notification, None, True)
+
+    def test_status_change_queues_email_without_sending(self):
+        self.decide('accepted', True)
+        self.assertEqual(len(mail.outbox), 0)
+        entry = EmailOutbox.objects.get()
+        self.assertEqual(entry.subject, 'Notification Approved')
+        self.assertEqual(entry.recipient, self.notification.email)
+
+    @override_settings(EMAIL_BACKEND='author.tests.CountingEmailBackend')
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(5):
+            enqueue_email('Subject', f'Body {i}', f'user{i}@example.com')
+        CountingEmailBackend.opened = 0
+
+        call_command('send_outbox', batch_size=10, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_BACKEND='author.tests.FailingEmailBackend',
+                       EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60)
+    def test_failed_sends_back_off_then_go_dead(self):
+        entry = enqueue_email('Subject', 'Body', 'user@example.com')
+
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retried': 1, 'dead': 0})
+        entry.refresh_from_db()
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn('SMTP server unavailable', entry.last_error)
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # Not due yet
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retried': 0, 'dead': 1})
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'dead')
+
+    @override_settings(EMAIL_BACKEND='author.tests.TransactionCheckingEmailBackend')
+    def test_emails_are_sent_outside_a_transaction(self):
+        enqueue_email('Subject', 'Body', 'user@example.com')
+        TransactionCheckingEmailBackend.atomic_depths = []
+
+        # TestCase wraps each test in atomic blocks of its own
+        depth = len(connection.atomic_blocks)
+        self.assertEqual(drain_outbox(), {'sent': 1, 'retried': 0, 'dead': 0})
+
+        self.assertEqual(TransactionCheckingEmailBackend.atomic_depths, [depth])
+
+    @override_settings(EMAIL_OUTBOX_LEASE_SECONDS=300)
+    def test_expired_claims_are_taken_over(self):
+        entry = enqueue_email('Subject', 'Body', 'user@example.com')
+        entries, lease = claim_batch(10)
+        self.assertEqual([e.pk for e in entries], [entry.pk])
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'sending')
+        self.assertEqual(entry.next_attempt_at, lease)
+
+        # Still leased to the first worker
+        self.assertEqual(drain_outbox(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+        # The first worker died, its lease runs out
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(), {'sent': 1, 'retried': 0, 'dead': 0})
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class NotificationAdminBulkActionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.notifications = make_notifications(6)
+        self.notifications[0].status = 'rejected'
+        self.notifications[0].save()
+
+    def run_action(self, action):
+        return self.client.post(reverse('admin:author_notification_changelist'), {
+            'action': action,
+            '_selected_action': [n.pk for n in self.notifications],
+        }, follow=True)
+
+    def test_accept_selected(self):
+        response = self.run_action('accept_selected')
+
+        self.assertContains(response, '5 notification(s) accepted, 1 skipped')
+        self.assertEqual(Notification.objects.filter(status='accepted', is_verified=True).count(), 5)
+        self.assertEqual(Notification.objects.get(pk=self.notifications[0].pk).status, 'rejected')
+        self.assertEqual(EmailOutbox.objects.filter(subject='Notification Approved').count(), 5)
+
+    def test_reject_selected_releases_slots(self):
+        self.run_action('reject_selected')
+
+        self.assertEqual(Notification.objects.filter(status='rejected').count(), 6)
+        self.assertFalse(Notification.objects.exclude(active_slot=None).exists())
+        self.assertEqual(EmailOutbox.objects.filter(subject='Notification Rejected').count(), 5)
+
+    def test_query_count_does_not_depend_on_selection_size(self):
+        make_notifications(50, start=timezone.now() + timedelta(days=30))
+        selected = list(Notification.objects.values_list('pk', flat=True))
+        request = RequestFactory().post('/')
+        request.user = self.user
+        admin_site = NotificationAdmin(Notification, admin.site)
+        admin_site.message_user = lambda *args, **kwargs: None
+
+        # savepoint, locking SELECT, UPDATE, outbox INSERT, release, count()
+        with self.assertNumQueries(6):
+            admin_site.accept_selected(request, Notification.objects.filter(pk__in=selected))
+
+
+@override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+class NotificationListCacheTests(TestCase):
+    url = reverse('notification-list')
+
+    def setUp(self):
+        cache.clear()
+        make_notifications(3)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url, {'verified': 'false', 'page_size': 2})
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'page_size': 2, 'verified': 'false'})
+        self.assertEqual(first.json(), second.json())
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get(self.url)
+        notification = Notification.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.name = 'Renamed'
+            notification.save()
+        response = self.client.get(self.url)
+        self.assertIn('Renamed', [n['name'] for n in response.json()['notifications']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['notifications']), 2)
+
+    def test_bulk_create_invalidates_cached_pages(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-bulk-create'), [{
+                'name': 'Batch',
+                'email': 'batch@example.com',
+                'scheduled_date': '2030-01-01T10:00:00Z',
+            }], content_type='application/json')
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['notifications']), 4)
+
+    @override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_is_not_used(self):
+        # Another worker could not see this process's version bumps
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+
+    def test_version_survives_eviction(self):
+        version = get_notifications_version()
+        bump_notifications_version()
+        self.assertEqual(get_notifications_version(), version + 1)
+        cache.clear()
+        self.assertGreater(get_notifications_version(), version + 1)
+
+
+@override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+class NotificationConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.notification = make_notifications(3)[0]
+
+    def test_list_not_modified_without_touching_the_database(self):
+        url = reverse('notification-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'verified': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_etag_and_last_modified(self):
+        url = reverse('notification-detail', args=[self.notification.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['notification']['id'], self.notification.pk)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.notification.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_found(self):
+        response = self.client.get(reverse('notification-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class NotificationFastSerializationTests(TestCase):
+
+    def setUp(self):
+        make_notifications(500)
+        Notification.objects.filter(pk__in=Notification.objects.order_by('id').values('pk')[:100]).update(
+            is_verified=True
+        )
+        Notification.objects.filter(pk=Notification.objects.order_by('id')[0].pk).update(
+            name='Aya   éè "quoted"',
+            scheduled_date=timezone.now().replace(microsecond=123456)
+        )
+
+    def slow(self):
+        return NotificationSerializer(Notification.objects.order_by('id'), many=True).data
+
+    def fast(self):
+        return serialize_notification_rows(Notification.objects.order_by('id').values(*NOTIFICATION_COLUMNS))
+
+    def test_output_matches_serializer(self):
+        self.assertEqual(JSONRenderer().render(self.fast()), JSONRenderer().render(self.slow()))
+        with override_settings(TIME_ZONE='Asia/Damascus'), timezone.override('Asia/Damascus'):
+            self.assertEqual(JSONRenderer().render(self.fast()), JSONRenderer().render(self.slow()))
+
+    def test_renderer_matches_json_renderer(self):
+        data = {'message': 'ok', 'next': None, 'notifications': self.slow(), 'when': timezone.now()}
+        self.assertEqual(NotificationJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            NotificationJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4')
+        )
+
+    def test_compare_serialization(self):
+        results = compare_serialization(iterations=2, rows=50)
+        self.assertEqual(results['fast']['bytes'], results['serializer']['bytes'])
+
+
+@override_settings(ROOT_URLCONF='author.async_urls')
+class AsyncNotificationViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.notification = make_notifications(3)[0]
+
+    @override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+    async def test_list_matches_sync_view(self):
+        response = await self.async_client.get(reverse('notification-list'), {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['notifications']), 2)
+
+        with override_settings(ROOT_URLCONF='library.urls'):
+            sync_response = await sync_to_async(self.client.get)(reverse('notification-list'), {'page_size': 2})
+        self.assertEqual(response.content, sync_response.content)
+        for header in ('Content-Type', 'ETag', 'Last-Modified'):
+            self.assertEqual(response.get(header), sync_response.get(header))
+
+    @override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+    async def test_list_is_cached_and_conditional(self):
+        url = reverse('notification-list')
+        response = await self.async_client.get(url)
+        self.assertIn('ETag', response)
+
+        # Without a version bump (on_commit callbacks don't run here) the change stays unseen
+        await Notification.objects.aupdate(name='Renamed')
+        cached = await self.async_client.get(url)
+        self.assertEqual(cached.content, response.content)
+
+        not_modified = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_create_update_delete(self):
+        url = reverse('notification-create')
+        response = await self.async_client.post(url, {
+            'name': 'Aya',
+            'email': 'aya@example.com',
+            'scheduled_date': '2030-01-01T10:00:00Z',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        created = await Notification.objects.aget(name='Aya')
+        self.assertEqual(created.active_slot, created.scheduled_date)
+
+        response = await self.async_client.put(
+            reverse('notification-update', args=[created.pk]),
+            {'name': 'Aya Updated'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['notification']['name'], 'Aya Updated')
+
+        response = await self.async_client.delete(reverse('notification-delete', args=[created.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Notification.objects.filter(pk=created.pk).aexists())
+
+    async def test_decision(self):
+        url = reverse('notification-decision', args=[self.notification.pk])
+        response = await self.async_client.post(url, {'action': 'reject'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        notification = await Notification.objects.aget(pk=self.notification.pk)
+        self.assertEqual(notification.status, 'rejected')
+        self.assertIsNone(notification.active_slot)
+
+        response = await self.async_client.post(url, {'action': 'maybe'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_taken_slot(self):
+        # The overlap lookup finds the booking, nothing is inserted
+        response = await self.async_client.post(reverse('notification-create'), {
+            'name': 'Aya',
+            'email': 'aya@example.com',
+            'scheduled_date': self.notification.scheduled_date.isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await Notification.objects.acount(), 3)
+
+
+class NotificationAvailabilityTests(TestCase):
+    url = reverse('notification-availability')
+
+    def setUp(self):
+        cache.clear()
+        availability._occupied_cache.clear()
+        day = timezone.now().date() + timedelta(days=1)
+        self.day = day.isoformat()
+        tz = timezone.get_current_timezone()
+        make_notifications(1, start=datetime.combine(day, dt_time(9, 0), tzinfo=tz))
+        make_notifications(1, start=datetime.combine(day, dt_time(10, 15), tzinfo=tz))
+        make_notifications(1, start=datetime.combine(day, dt_time(11, 0), tzinfo=tz), status='rejected')
+
+    def starts(self, response):
+        return [slot['start'][11:16] for slot in response.json()['slots']]
+
+    def test_free_slots_within_working_hours(self):
+        response = self.client.get(self.url, {
+            'start': self.day, 'end': self.day, 'slot_minutes': 60, 'work_start': '09:00', 'work_end': '13:00'
+        })
+        self.assertEqual(response.status_code, 200)
+        # 09:00 and 10:00-11:00 are taken, the rejected 11:00 booking does not count
+        self.assertEqual(self.starts(response), ['11:00', '12:00'])
+
+    @override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+    def test_occupied_slots_are_cached_until_notifications_change(self):
+        params = {'start': self.day, 'end': self.day}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+
+        bump_notifications_version()
+        with self.assertNumQueries(1):
+            self.client.get(self.url, params)
+
+    def test_month_wide_query_is_one_range_query(self):
+        end = (timezone.now().date() + timedelta(days=31)).isoformat()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'start': self.day, 'end': end, 'slot_minutes': 15})
+        # The two 30 minute bookings take two 15 minute slots each
+        self.assertEqual(len(response.json()['slots']), 31 * 32 - 4)
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.url, {'start': self.day, 'end': '2000-01-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'start': self.day, 'end': self.day, 'work_start': '18:00'})
+        self.assertEqual(response.status_code, 400)
+
+
+class EndpointQueryBudgetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        seed_notifications(200)
+
+    def test_every_route_has_a_scenario_and_budget(self):
+        routes = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(routes, set(QUERY_BUDGETS))
+        self.assertEqual(routes, {scenario.route for scenario in build_scenarios()})
+
+    def test_routes_stay_within_query_budgets(self):
+        results = run_benchmarks(iterations=3)
+        for name, result in results.items():
+            with self.subTest(name):
+                self.assertTrue(
+                    all(200 <= code < 300 for code in result['status_codes']), result['status_codes']
+                )
+                self.assertLessEqual(result['max_queries'], result['query_budget'])
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_summarize_timings(self):
+        self.assertEqual(summarize_timings([0.001 * i for i in range(1, 101)]), {
+            'iterations': 100, 'p50_ms': 50.0, 'p95_ms': 95.0, 'mean_ms': 50.5,
+        })
+
+
+class PerformanceMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        make_notifications(3)
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=True, PERFORMANCE_METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_server_timing_and_metrics(self):
+        response = self.client.get(reverse('notification-list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries", render;dur=[\d.]+')
+
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="notification-list"} 1', metrics)
+        self.assertIn('http_request_db_queries_sum{view="notification-list"} 1', metrics)
+        self.assertIn(
+            f'http_response_size_bytes_sum{{view="notification-list"}} {len(response.content)}', metrics
+        )
+        self.assertIn('http_request_render_duration_seconds_count{view="notification-list"} 1', metrics)
+
+    @override_settings(ROOT_URLCONF='author.async_urls', PERFORMANCE_SERVER_TIMING=True)
+    async def test_async_view_queries_are_counted(self):
+        # The async ORM runs the queries in another thread, with its own connection
+        response = await self.async_client.get(reverse('notification-list'), {'include_count': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="2 queries"')
+        self.assertIn('http_request_db_queries_sum{view="notification-list"} 2', registry.render())
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0, PERFORMANCE_SERVER_TIMING=True)
+    def test_unsampled_requests_are_not_measured(self):
+        response = self.client.get(reverse('notification-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('view="notification-list"', registry.render())
+
+    def test_nothing_is_exposed_by_default(self):
+        response = self.client.get(reverse('notification-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        self.assertIn('view="notification-list"', registry.render())
+
+    @override_settings(PERFORMANCE_METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_metrics_can_be_restricted(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry.observe('view', {'http_request_db_queries': 1})
+        registry.observe('view', {'http_request_db_queries': 7})
+        rendered = registry.render()
+        self.assertIn('http_request_db_queries_bucket{view="view",le="1"} 1', rendered)
+        self.assertIn('http_request_db_queries_bucket{view="view",le="10"} 2', rendered)
+        self.assertIn('http_request_db_queries_bucket{view="view",le="+Inf"} 2', rendered)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], REPLICA_PIN_SECONDS=7)
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def read_database_during(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(self.router.db_for_read(Notification))
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return seen[0], response
+
+    def test_reads_go_to_replicas_and_writes_to_primary(self):
+        self.assertIn(self.router.db_for_read(Notification), ['replica1', 'replica2'])
+        self.assertEqual(self.router.db_for_write(Notification), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Notification), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'author'))
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        database, response = self.read_database_during(RequestFactory().post('/notifications/create/'))
+        self.assertEqual(database, 'default')
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 7)
+
+        request = RequestFactory().get('/notifications/')
+        request.COOKIES['pin_primary'] = '1'
+        database, response = self.read_database_during(request)
+        self.assertEqual(database, 'default')
+        self.assertNotIn('pin_primary', response.cookies)
+
+        database, _ = self.read_database_during(RequestFactory().get('/notifications/'))
+        self.assertIn(database, ['replica1', 'replica2'])
+
+    @override_settings(NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+    def test_cache_is_skipped_while_replicas_may_lag(self):
+        cache.set(LAST_MODIFIED_KEY, time.time() - 10, None)
+        self.assertTrue(read_caching_enabled())
+        self.assertIsNotNone(list_etag(QueryDict()))
+
+        # A client reading its own writes must not get a page a replica built
+        with use_primary():
+            self.assertFalse(read_caching_enabled())
+            self.assertEqual(get_cached_list(QueryDict()), (None, None))
+            self.assertIsNone(list_etag(QueryDict()))
+
+        # Nor may others cache replica reads under a version bumped moments ago
+        bump_notifications_version()
+        self.assertFalse(read_caching_enabled())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Notification), 'default')
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "set DATABASE_REPLICA_URLS, e.g. sqlite:////tmp/replica.sqlite3")
+class ReplicaDatabaseTests(TransactionTestCase):
+    """
+    Runs requests against a configured replica (which mirrors the test database):
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 python manage.py test author.tests.ReplicaDatabaseTests
+    """
+    databases = '__all__'
+
+    def test_requests_route_reads_and_pin_after_writes(self):
+        self.assertIn(Notification.objects.all().db, settings.DATABASE_REPLICAS)
+        response = self.client.post(reverse('notification-create'), {
+            'name': 'Aya', 'email': 'aya@example.com', 'scheduled_date': '2030-01-01T10:00:00Z'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('pin_primary', response.cookies)
+
+        response = self.client.get(reverse('notification-list'))
+        self.assertEqual([n['name'] for n in response.json()['notifications']], ['Aya'])
+
+
+@override_settings(NOTIFICATION_EXPORT_CHUNK_SIZE=4)
+class NotificationExportTests(TestCase):
+    url = reverse('notification-export')
+
+    def setUp(self):
+        self.notifications = make_notifications(10, start=datetime(2030, 1, 1, 20, tzinfo=dt_timezone.utc))
+        Notification.objects.filter(pk=self.notifications[0].pk).update(
+            status='accepted', is_verified=True, name='Aya, "quoted"'
+        )
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_every_row_in_batches(self):
+        with self.assertNumQueries(3):
+            response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], [n.pk for n in self.notifications])
+        self.assertEqual(rows[0]['name'], 'Aya, "quoted"')
+        self.assertEqual(rows[0]['status'], 'Verified')
+
+    def test_ndjson_export_matches_api_representation(self):
+        response, content = self.export(format='ndjson', verified='true')
+        lines = [json.loads(line) for line in content.splitlines()]
+        expected = NotificationSerializer(Notification.objects.get(pk=self.notifications[0].pk)).data
+        self.assertEqual(lines, [dict(expected)])
+
+    def test_filters(self):
+        # Bookings start 2030-01-01 20:00 and are an hour apart: 4 on the 1st, 6 on the 2nd
+        _, content = self.export(format='ndjson', start='2030-01-02', end='2030-01-02')
+        self.assertEqual(len(content.splitlines()), 6)
+        _, content = self.export(format='ndjson', status='accepted')
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start': '2030-02-01', 'end': '2030-01-01'}).status_code, 400)
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=30)
+class NotificationArchiveTests(TestCase):
+    def setUp(self):
+        now = timezone.now().replace(microsecond=0)
+        self.old = make_notifications(5, start=now - timedelta(days=60), status='accepted')
+        self.recent = make_notifications(3, start=now - timedelta(days=1))
+        # Rejected long ago, for a date that is still ahead
+        self.rejected = make_notifications(2, start=now + timedelta(days=10), status='rejected')
+        Notification.objects.filter(pk__in=[n.pk for n in self.rejected]).update(
+            updated_at=now - timedelta(days=45)
+        )
+        self.upcoming = make_notifications(2, start=now + timedelta(days=20))
+        enqueue_email('Subject', 'Body', 'user0@example.com', notification=self.old[0])
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_and_stale_rejected_notifications(self):
+        output = self.archive('--batch-size', '3')
+
+        archived_ids = sorted(n.pk for n in self.old + self.rejected)
+        self.assertEqual(sorted(NotificationArchive.objects.values_list('id', flat=True)), archived_ids)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('id', flat=True)),
+            sorted(n.pk for n in self.recent + self.upcoming)
+        )
+        archived = NotificationArchive.objects.get(pk=self.old[0].pk)
+        self.assertEqual((archived.email, archived.status), (self.old[0].email, 'accepted'))
+        # The queued email keeps its content without holding on to the live row
+        self.assertIsNone(EmailOutbox.objects.get().notification_id)
+
+        self.assertIn('Archived 3/7', output)
+        self.assertIn('Archive complete: 7 notification(s)', output)
+        self.assertIsNotNone(ArchiveCheckpoint.objects.get().finished_at)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        output = self.archive('--batch-size', '2', '--max-batches', '1')
+        self.assertIn('Stopped after 1 batch(es)', output)
+        self.assertEqual(NotificationArchive.objects.count(), 2)
+
+        output = self.archive('--batch-size', '2')
+        self.assertIn('(2 already archived)', output)
+        self.assertEqual(NotificationArchive.objects.count(), 7)
+        checkpoint = ArchiveCheckpoint.objects.get()
+        self.assertEqual(checkpoint.archived, 7)
+
+        # A finished run is not resumed, the next one starts fresh
+        self.archive()
+        self.assertEqual(ArchiveCheckpoint.objects.count(), 2)
+
+    def test_dry_run_changes_nothing(self):
+        self.assertIn('7 notification(s)', self.archive('--dry-run'))
+        self.assertEqual(Notification.objects.count(), 12)
+        self.assertFalse(ArchiveCheckpoint.objects.exists())
+
+    def test_ids_beyond_32_bits(self):
+        # The live table's ids are 64 bit, the archive and the checkpoint keep them as is
+        big = make_notifications(1, start=timezone.now() - timedelta(days=90), id=2**31 + 5)[0]
+        self.archive()
+        self.assertTrue(NotificationArchive.objects.filter(pk=big.pk).exists())
+        self.assertEqual(ArchiveCheckpoint.objects.get().last_id, big.pk)
+
+    def test_archive_list_endpoint(self):
+        self.archive()
+        response = self.client.get(reverse('notification-archive-list'), {'email': 'user0@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(n['id'] for n in response.data['notifications']),
+            [self.old[0].pk, self.rejected[0].pk]
+        )
+
+
+class IdempotencyKeyTests(TestCase):
+    url = reverse('notification-create')
+    payload = {'name': 'Aya', 'email': 'aya@example.com', 'scheduled_date': '2030-01-01T10:00:00Z'}
+
+    def post(self, key, payload=None, url=None):
+        return self.client.post(
+            url or self.url, payload or self.payload, content_type='application/json',
+            headers={'Idempotency-Key': key}
+        )
+
+    def test_retry_replays_the_original_response(self):
+        first = self.post('key-1')
+        self.assertEqual(first.status_code, 201)
+
+        # No validation, slot check or insert the second time round
+        with self.assertNumQueries(1):
+            retry = self.post('key-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_key_reused_with_a_different_request(self):
+        self.post('key-1')
+        response = self.post('key-1', {**self.payload, 'scheduled_date': '2030-01-01T11:00:00Z'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_duplicate_while_the_original_is_in_progress(self):
+        IdempotencyKey.objects.create(
+            key='key-1', scope=self.url, fingerprint='in-flight',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        response = self.post('key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_expired_key_is_reused(self):
+        self.post('key-1')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.post('key-1', {**self.payload, 'scheduled_date': '2030-01-01T11:00:00Z'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_decision_replay(self):
+        notification = make_notifications(1)[0]
+        url = reverse('notification-decision', args=[notification.pk])
+        self.assertEqual(self.post('decide', {'action': 'accept'}, url).status_code, 200)
+        Notification.objects.filter(pk=notification.pk).update(status='pending')
+        self.assertEqual(self.post('decide', {'action': 'accept'}, url)['Idempotent-Replayed'], 'true')
+        self.assertEqual(Notification.objects.get(pk=notification.pk).status, 'pending')
+
+    def test_purge_expired_keys(self):
+        self.post('key-1')
+        self.post('key-2', {**self.payload, 'scheduled_date': '2030-01-01T11:00:00Z'})
+        IdempotencyKey.objects.filter(key='key-1').update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1 expired', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['key-2'])
+
+    @override_settings(ROOT_URLCONF='author.async_urls')
+    async def test_async_views(self):
+        responses = [
+            await self.async_client.post(
+                self.url, self.payload, content_type='application/json', headers={'Idempotency-Key': 'async'}
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(responses[1]['Idempotent-Replayed'], 'true')
+        self.assertEqual(await Notification.objects.acount(), 1)
+
+
+class OptimisticConcurrencyTests(TestCase):
+
+    def setUp(self):
+        self.notification = make_notifications(2)[0]
+        self.url = reverse('notification-update', args=[self.notification.pk])
+
+    def put(self, data, **headers):
+        return self.client.put(self.url, data, content_type='application/json', headers=headers)
+
+    def test_update_is_one_conditional_statement(self):
+        etag = self.client.get(reverse('notification-detail', args=[self.notification.pk]))['ETag']
+        self.assertEqual(etag, '"1"')
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.put({'name': 'Renamed'}, **{'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.json()['notification']['name'], 'Renamed')
+        writes = [query['sql'] for query in captured if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"version" = ', writes[0].split('WHERE')[1])
+        self.assertFalse(any(query['sql'].startswith('SELECT') for query in captured[:-1]))
+
+    def test_stale_version_is_rejected(self):
+        self.put({'name': 'First'}, **{'If-Match': '"1"'})
+        response = self.put({'name': 'Second'}, **{'If-Match': '"1"'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 2)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(Notification.objects.get(pk=self.notification.pk).name, 'First')
+
+    def test_verified_between_read_and_write(self):
+        Notification.objects.filter(pk=self.notification.pk).update(
+            status='accepted', is_verified=True, version=F('version') + 1
+        )
+        response = self.put({'name': 'Too late'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Notification.objects.get(pk=self.notification.pk).name, 'User 0')
+
+    def test_moving_to_a_taken_slot(self):
+        other = Notification.objects.exclude(pk=self.notification.pk).get()
+        response = self.put({'scheduled_date': other.scheduled_date.isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+        new_date = other.scheduled_date + timedelta(days=1)
+        self.assertEqual(self.put({'scheduled_date': new_date.isoformat()}).status_code, 200)
+        self.assertEqual(Notification.objects.get(pk=self.notification.pk).active_slot, new_date)
+
+    def test_unknown_notification_and_bad_header(self):
+        response = self.client.put(
+            reverse('notification-update', args=[0]), {'name': 'x'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.put({'name': 'x'}, **{'If-Match': '"one"'}).status_code, 400)
+        self.assertEqual(self.put({'name': 'x'}, **{'If-Match': '"1", "2"'}).status_code, 400)
+
+    def test_weak_etag_of_a_compressed_response(self):
+        response = self.put({'name': 'Renamed'}, **{'If-Match': 'W/"1"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.put({'name': 'Again'}, **{'If-Match': 'W/"1"'}).status_code, 409)
+
+    def test_every_write_bumps_the_version(self):
+        self.notification.status = 'rejected'
+        self.notification.save(update_fields=['status'])
+        self.assertEqual(Notification.objects.get(pk=self.notification.pk).version, 2)
+
+
+class NotificationTransitionTests(TestCase):
+
+    def setUp(self):
+        self.notifications = make_notifications(4)
+        self.notifications[1].status = 'rejected'
+        self.notifications[1].save()
+
+    def decide(self, notification, action):
+        return self.client.post(
+            reverse('notification-decision', args=[notification.pk]), {'action': action},
+            content_type='application/json'
+        )
+
+    def test_accept_is_one_conditional_update(self):
+        with self.assertNumQueries(1):
+            response = self.decide(self.notifications[0], 'accept')
+        self.assertEqual(response.status_code, 200)
+        notification = Notification.objects.get(pk=self.notifications[0].pk)
+        self.assertEqual((notification.status, notification.is_verified), ('accepted', True))
+        self.assertEqual(notification.active_slot, notification.scheduled_date)
+        self.assertEqual(notification.version, 2)
+
+    def test_decided_notifications_are_not_rewritten(self):
+        rejected = self.notifications[1]
+        before = Notification.objects.get(pk=rejected.pk)
+        response = self.decide(rejected, 'accept')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'rejected')
+        after = Notification.objects.get(pk=rejected.pk)
+        self.assertEqual(
+            (after.status, after.version, after.updated_at),
+            ('rejected', before.version, before.updated_at)
+        )
+
+        self.assertEqual(self.client.post(
+            reverse('notification-decision', args=[0]), {'action': 'accept'}, content_type='application/json'
+        ).status_code, 404)
+
+    def test_reject_releases_the_slot(self):
+        self.decide(self.notifications[0], 'reject')
+        notification = Notification.objects.get(pk=self.notifications[0].pk)
+        self.assertEqual((notification.status, notification.is_verified), ('rejected', False))
+        self.assertIsNone(notification.active_slot)
+
+    def test_batch_decision(self):
+        missing = self.notifications[-1].pk + 100
+        ids = [n.pk for n in self.notifications] + [missing]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(
+                reverse('notification-batch-decision'), {'action': 'accept', 'ids': ids},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        # Locking SELECT and UPDATE, whatever the batch size
+        self.assertEqual(count_queries(captured.captured_queries), 2)
+        data = response.json()
+        self.assertEqual((data['updated'], data['invalid'], data['not_found']), (3, 1, 1))
+        self.assertEqual(data['results'][1], {'id': ids[1], 'result': 'invalid_transition', 'status': 'rejected'})
+        self.assertEqual(data['results'][4], {'id': missing, 'result': 'not_found'})
+        self.assertEqual(Notification.objects.filter(status='accepted', is_verified=True).count(), 3)
+
+    def test_batch_decision_validation(self):
+        def post(data):
+            return self.client.post(reverse('notification-batch-decision'), data, content_type='application/json')
+
+        self.assertEqual(post({'action': 'maybe', 'ids': [1]}).status_code, 400)
+        self.assertEqual(post({'action': 'accept', 'ids': []}).status_code, 400)
+        self.assertEqual(post({'action': 'accept', 'ids': [2**63]}).status_code, 400)
+        self.assertEqual(post({'action': 'accept', 'ids': [10**30]}).status_code, 400)
+        with override_settings(NOTIFICATION_BATCH_DECISION_MAX=2):
+            self.assertEqual(post({'action': 'accept', 'ids': [1, 2, 3]}).status_code, 400)
+
+
+class OpenAPISchemaTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'openapi.json')
+        docs._schema_file = None
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(setattr, docs, '_schema_file', None)
+
+    def test_generated_schema_is_served_with_etag(self):
+        call_command('generate_openapi_schema', output=self.path, stdout=StringIO())
+        with open(self.path) as schema:
+            paths = json.load(schema)['paths']
+        self.assertIn('/notifications/{id}/update/', paths)
+        self.assertIn('If-Match', [p['name'] for p in paths['/notifications/{id}/update/']['put']['parameters']])
+
+        with override_settings(OPENAPI_SCHEMA_PATH=self.path):
+            request = RequestFactory().get('/swagger/schema.json')
+            response = docs.schema_file_view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content)['paths'], paths)
+
+            request = RequestFactory().get('/swagger/schema.json', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(docs.schema_file_view(request).status_code, 304)
+
+    def test_missing_schema_file(self):
+        with override_settings(OPENAPI_SCHEMA_PATH=self.path):
+            self.assertEqual(docs.schema_file_view(RequestFactory().get('/swagger/schema.json')).status_code, 404)
+
+    def test_api_processes_do_not_import_drf_yasg(self):
+        code = (
+            'import sys, django; django.setup(); '
+            'from django.urls import resolve; resolve("/notifications/"); '
+            'print("drf_yasg" in sys.modules)'
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'library.settings', 'API_DOCS_LIVE': 'false'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=env, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+class NotificationSearchTests(TestCase):
+    url = reverse('notification-list')
+
+    def setUp(self):
+        cache.clear()
+        start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        for i, (name, email) in enumerate([
+            ('John Smith', 'john.smith@example.com'),
+            ('Johanna Berg', 'jo.berg@mail.org'),
+            ('Aya Hiader', 'aya@example.com'),
+        ]):
+            Notification.objects.create(name=name, email=email, scheduled_date=start + timedelta(hours=i))
+
+    def names(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(n['name'] for n in response.json()['notifications'])
+
+    def test_prefix_matches_name_or_email_in_any_case(self):
+        self.assertEqual(self.names({'prefix': 'JOH'}), ['Johanna Berg', 'John Smith'])
+        self.assertEqual(self.names({'prefix': 'jo.'}), ['Johanna Berg'])
+        self.assertEqual(self.names({'prefix': 'aya@'}), ['Aya Hiader'])
+        self.assertEqual(self.names({'prefix': 'smith'}), [])
+
+    def test_prefix_is_an_index_range_scan(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.names({'prefix': 'jo'})
+        sql = captured.captured_queries[-1]['sql']
+        self.assertIn('"search_name" >= ', sql)
+        self.assertNotIn('LIKE', sql)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN SELECT id FROM author_notification '
+                "WHERE search_name >= 'jo' AND search_name < 'jp'"
+            )
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('notification_search_name_idx', plan)
+
+    def test_prefix_of_last_code_points(self):
+        self.assertEqual(prefix_upper_bound('jo'), 'jp')
+        self.assertEqual(prefix_upper_bound('j\U0010ffff\U0010ffff'), 'k')
+        self.assertEqual(prefix_upper_bound('j\ud7ff'), 'j\ue000')
+        self.assertIsNone(prefix_upper_bound('\U0010ffff'))
+        # Nothing to increment, the range has no upper bound
+        self.assertEqual(self.names({'prefix': '\U0010ffff'}), [])
+        self.assertEqual(self.names({'prefix': 'jo\U0010ffff'}), [])
+
+    def test_token_search_uses_the_fulltext_index(self):
+        self.assertEqual(self.names({'search': 'smith'}), ['John Smith'])
+        self.assertEqual(self.names({'search': 'exam jo'}), ['John Smith'])
+        self.assertEqual(self.names({'search': 'berg mail'}), ['Johanna Berg'])
+        with CaptureQueriesContext(connection) as captured:
+            self.names({'search': 'example'})
+        self.assertIn('author_notification_fts', captured.captured_queries[-1]['sql'])
+
+    def test_fulltext_index_follows_updates_and_deletes(self):
+        notification = Notification.objects.get(name='Aya Hiader')
+        Notification.objects.filter(pk=notification.pk).update(name='Aya Renamed')
+        self.assertEqual(self.names({'search': 'renamed'}), ['Aya Renamed'])
+        self.assertEqual(self.names({'search': 'hiader'}), [])
+        self.assertEqual(self.names({'prefix': 'aya r'}), ['Aya Renamed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.delete()
+        self.assertEqual(self.names({'search': 'renamed'}), [])
+
+    def test_reinstalling_the_index_is_harmless(self):
+        install_fulltext_index(connection)
+        self.assertEqual(self.names({'search': 'smith'}), ['John Smith'])
+
+    @override_settings(NOTIFICATION_SEARCH_BACKEND='author.search.BasicSearchBackend')
+    def test_backend_setting(self):
+        self.assertEqual(self.names({'search': 'ohn'}), ['John Smith'])
+        self.assertEqual(
+            list(BasicSearchBackend().filter(Notification.objects.all(), ['hiader']).values_list('name', flat=True)),
+            ['Aya Hiader']
+        )
+
+    def test_mysql_backend_matches_against_the_fulltext_index(self):
+        queryset = MySQLFullTextSearchBackend().filter(Notification.objects.all(), ['john', 'exam'])
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('MATCH ("author_notification".`name`, "author_notification".`email`) AGAINST (%s', sql)
+        self.assertIn('+john* +exam*', params)
+
+    def test_invalid_queries(self):
+        for params in ({'prefix': ' '}, {'search': '@@'}, {'search': 'x' * 300}, {'search': ' '.join('abcdefghij')}):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_admin_search_uses_fulltext_backend(self):
+        model_admin = NotificationAdmin(Notification, admin.site)
+        request = RequestFactory().get('/')
+        queryset, use_distinct = model_admin.get_search_results(request, Notification.objects.all(), 'john example')
+        self.assertFalse(use_distinct)
+        self.assertEqual(list(queryset.values_list('name', flat=True)), ['John Smith'])
+        queryset, _ = model_admin.get_search_results(request, Notification.objects.all(), '@@')
+        self.assertFalse(queryset.exists())
+
+    def test_compare_search(self):
+        seed_notifications(300)
+        results = compare_search(iterations=2)
+        self.assertEqual(results['icontains:user1']['rows'], results['fulltext:user1']['rows'])
+        self.assertEqual(results['prefix:user12345']['rows'], 0)
+        self.assertEqual(results['fulltext:user1']['rows'], 50)
+
+
+@skipUnless(connection.vendor == 'sqlite', "query plans are checked on SQLite")
+class NotificationQueryPlanTests(TestCase):
+    """
+    The hot notification queries must be answered from an index. SQLite reports a full
+    table scan as ``SCAN author_notification`` and an extra sort as ``USE TEMP B-TREE``.
+    """
+
+    def setUp(self):
+        seed_notifications(200)
+        self.now = timezone.now()
+
+    def assertUsesIndex(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, r'SCAN author_notification\s*$|SCAN author_notification\n', plan)
+        self.assertNotIn('USE TEMP B-TREE', plan)
+        if index is not None:
+            self.assertIn(index, plan)
+
+    def test_listing_pages(self):
+        rows = Notification.objects.values(*NOTIFICATION_COLUMNS)
+        first = rows.order_by('created_at', 'id')[:51]
+        self.assertUsesIndex(first, 'notification_created_idx')
+
+        paginator = NotificationCursorPagination(RequestFactory().get('/', {
+            'cursor': encode_cursor(self.now, 100)
+        }))
+        self.assertUsesIndex(paginator.get_window(rows), 'notification_created_idx')
+
+    def test_verified_listing(self):
+        for verified in (True, False):
+            with self.subTest(verified=verified):
+                rows = Notification.objects.verified(verified).values(*NOTIFICATION_COLUMNS)
+                self.assertUsesIndex(rows.order_by('created_at', 'id')[:51], 'notification_verified_idx')
+                paginator = NotificationCursorPagination(RequestFactory().get('/', {
+                    'cursor': encode_cursor(self.now, 100, reverse=True)
+                }))
+                self.assertUsesIndex(paginator.get_window(rows), 'notification_verified_idx')
+
+    def test_slot_checks(self):
+        slot = Notification.objects.values_list('scheduled_date', flat=True).first()
+        self.assertUsesIndex(Notification.objects.filter(active_slot=slot))
+        self.assertUsesIndex(Notification.objects.filter(active_slot__in=[slot, slot + timedelta(minutes=5)]))
+        self.assertUsesIndex(
+            Notification.objects.filter(scheduled_date=slot, status__in=Notification.ACTIVE_STATUSES),
+            'notification_scheduled_idx'
+        )
+        self.assertUsesIndex(
+            Notification.objects.filter(active_slot__gte=slot, active_slot__lt=slot + timedelta(days=30))
+            .order_by('active_slot')
+        )
+        self.assertUsesIndex(
+            Notification.objects.overlapping(slot, slot + timedelta(minutes=30)), 'notification_active_range_idx'
+        )
+
+    def test_date_ranges(self):
+        start = Notification.objects.values_list('scheduled_date', flat=True).first()
+        day = Notification.objects.filter(scheduled_date__gte=start, scheduled_date__lt=start + timedelta(days=1))
+        self.assertUsesIndex(day, 'notification_scheduled_idx')
+        self.assertUsesIndex(day.filter(status='accepted'))
+
+    def test_admin_changelist_filters(self):
+        model_admin = NotificationAdmin(Notification, admin.site)
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        for params, index in (
+            ({}, 'notification_created_idx'),
+            ({'status__exact': 'pending'}, 'notification_status_idx'),
+            ({'is_verified__exact': '1'}, 'notification_verified_idx'),
+        ):
+            with self.subTest(params):
+                request = RequestFactory().get('/admin/author/notification/', params)
+                request.user = user
+                changelist = model_admin.get_changelist_instance(request)
+                self.assertUsesIndex(changelist.get_queryset(request)[:100], index)
+
+    def test_search(self):
+        self.assertUsesIndex(filter_prefix(Notification.objects.all(), 'user12'))
+
+
+@override_settings(NOTIFICATION_ADMIN_COUNT_LIMIT=150, NOTIFICATION_ADMIN_MAX_PAGES=3)
+class NotificationAdminChangelistTests(TestCase):
+    url = reverse('admin:author_notification_changelist')
+
+    def setUp(self):
+        seed_notifications(250)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def get(self, params=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        notification_queries = [q['sql'] for q in captured.captured_queries if 'author_notification' in q['sql']]
+        return response, notification_queries
+
+    def test_counts_come_from_table_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        response, queries = self.get()
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql], queries)
+        self.assertEqual(response.context['cl'].result_count, 250)
+
+    def test_filtered_count_is_capped(self):
+        response, queries = self.get({'status__exact': 'pending'})
+        self.assertEqual(response.context['cl'].result_count, 150)
+        self.assertTrue(all('LIMIT' in sql for sql in queries if 'COUNT(' in sql), queries)
+
+    def test_only_displayed_columns_are_loaded(self):
+        response, queries = self.get()
+        page_query = next(sql for sql in queries if 'ORDER BY "author_notification"."created_at" DESC' in sql)
+        self.assertIn('"name"', page_query)
+        self.assertNotIn('"version"', page_query)
+        self.assertNotIn('"active_slot"', page_query)
+
+    def test_cursor_navigation_past_the_numbered_pages(self):
+        expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, params = [], {}
+        while True:
+            response, _ = self.get(params)
+            changelist = response.context['cl']
+            seen.extend(notification.pk for notification in changelist.result_list)
+            if changelist.next_cursor is None:
+                break
+            self.assertContains(response, 'Next page')
+            params = {'cursor': changelist.next_cursor}
+        self.assertEqual(seen, expected)
+
+        # Numbered pages stop at NOTIFICATION_ADMIN_MAX_PAGES
+        response = self.client.get(self.url, {'p': 4})
+        self.assertEqual(response.status_code, 302)
+
+    def test_cursor_keeps_filters_and_date_hierarchy(self):
+        response, _ = self.get({'status__exact': 'pending'})
+        self.assertIn('status__exact=pending', response.context['cl'].next_cursor_url)
+        first = Notification.objects.order_by('scheduled_date').first().scheduled_date
+        response, _ = self.get({'scheduled_date__year': first.year, 'scheduled_date__month': first.month})
+        self.assertTrue(response.context['cl'].result_list)
+
+    def test_date_hierarchy_seeks_instead_of_scanning(self):
+        make_notifications(3, start=datetime(2033, 12, 31, 22, tzinfo=dt_timezone.utc))
+        make_notifications(2, start=datetime(2035, 3, 1, tzinfo=dt_timezone.utc))
+        _, queries = self.get()
+        self.assertFalse([sql for sql in queries if 'DISTINCT' in sql or 'MIN(' in sql], queries)
+
+        queryset = ChangeListQuerySet(Notification)
+        for kind in ('year', 'month', 'day'):
+            with self.subTest(kind):
+                self.assertEqual(
+                    queryset.datetimes('scheduled_date', kind),
+                    list(Notification.objects.datetimes('scheduled_date', kind))
+                )
+        pending = queryset.filter(status='pending')
+        self.assertEqual(
+            pending.aggregate(first=Min('scheduled_date'), last=Max('scheduled_date')),
+            Notification.objects.filter(status='pending').aggregate(first=Min('scheduled_date'), last=Max('scheduled_date'))
+        )
+
+    def test_benchmark_admin_changelist(self):
+        results = benchmark_admin_changelist(iterations=2)
+        self.assertTrue(all(result['status_codes'] == [200] for result in results.values()), results)
+
+
+class DailySummaryTests(TestCase):
+    day = datetime(2032, 5, 1, 9, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.notifications = make_notifications(4, start=self.day)
+
+    def counts(self):
+        return {
+            (day.isoformat(), status): total
+            for (day, status), total in summary_counts().items()
+        }
+
+    def assertConsistent(self):
+        self.assertEqual(summary_mismatches(), [])
+
+    def test_creates_and_bulk_creates_are_counted(self):
+        self.assertEqual(self.counts(), {('2032-05-01', 'pending'): 4})
+        response = self.client.post(reverse('notification-create'), {
+            'name': 'Aya', 'email': 'aya@example.com', 'scheduled_date': '2032-05-02T10:00:00Z'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.client.post(reverse('notification-bulk-create'), [
+            {'name': 'Bulk', 'email': 'bulk@example.com', 'scheduled_date': '2032-05-02T11:00:00Z'},
+            {'name': 'Bulk', 'email': 'bulk@example.com', 'scheduled_date': '2032-05-02T23:30:00Z'},
+        ], content_type='application/json')
+        self.assertEqual(self.counts()[('2032-05-02', 'pending')], 3)
+        self.assertConsistent()
+
+    def test_decisions_move_counts_between_statuses(self):
+        first, second, third, _ = self.notifications
+        response = self.client.post(reverse('notification-decision', args=[first.pk]), {'action': 'accept'})
+        self.assertEqual(response.status_code, 200)
+        self.client.post(reverse('notification-batch-decision'), {
+            'action': 'reject', 'ids': [second.pk, third.pk]
+        }, content_type='application/json')
+        self.assertEqual(self.counts(), {
+            ('2032-05-01', 'pending'): 1, ('2032-05-01', 'accepted'): 1, ('2032-05-01', 'rejected'): 2,
+        })
+        self.assertConsistent()
+
+    def test_admin_save_update_and_delete(self):
+        first, second, third, _ = self.notifications
+        model_admin = NotificationAdmin(Notification, admin.site)
+        first.status = 'rejected'
+        model_admin.save_model(RequestFactory().post('/'), first, None, True)
+
+        response = self.client.put(
+            reverse('notification-update', args=[second.pk]),
+            {'scheduled_date': '2032-05-03T09:00:00Z'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        # Same day, other time: the counts do not move
+        Notification.objects.filter(pk=third.pk).update(scheduled_date=self.day + timedelta(hours=10))
+        self.client.delete(reverse('notification-delete', args=[self.notifications[3].pk]))
+
+        self.assertEqual(self.counts(), {
+            ('2032-05-01', 'pending'): 1, ('2032-05-01', 'rejected'): 1, ('2032-05-03', 'pending'): 1,
+        })
+        self.assertConsistent()
+
+    def test_calendar_endpoint_reads_the_summary(self):
+        self.client.post(reverse('notification-decision', args=[self.notifications[0].pk]), {'action': 'accept'})
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-calendar'), {'start': '2032-04-30', 'end': '2032-05-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['days'], [
+            {'date': '2032-04-30', 'pending': 0, 'accepted': 0, 'rejected': 0, 'total': 0},
+            {'date': '2032-05-01', 'pending': 3, 'accepted': 1, 'rejected': 0, 'total': 4},
+            {'date': '2032-05-02', 'pending': 0, 'accepted': 0, 'rejected': 0, 'total': 0},
+        ])
+
+        response = self.client.get(reverse('notification-calendar'), {'start': '2032-05-02', 'end': '2032-05-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('notification-calendar'), {'start': '2030-01-01', 'end': '2032-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_and_rebuild_command(self):
+        DailyStatusCount.objects.filter(status='pending').update(total=99)
+        DailyStatusCount.objects.create(day=self.day.date() + timedelta(days=1), status='accepted', total=2)
+        self.assertEqual(len(summary_mismatches()), 2)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_summary', '--check', stdout=StringIO())
+
+        call_command('rebuild_daily_summary', stdout=StringIO())
+        self.assertConsistent()
+        self.assertEqual(summary_counts(), live_counts())
+        call_command('rebuild_daily_summary', '--check', stdout=StringIO())
+
+
+class NotificationSparseFieldsTests(TestCase):
+    url = reverse('notification-list')
+
+    def setUp(self):
+        cache.clear()
+        self.notifications = make_notifications(5)
+
+    def test_list_selects_fields_and_columns(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url, {'fields': 'status,id,scheduled_date', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['notifications']
+        self.assertEqual([list(row) for row in rows], [['id', 'scheduled_date', 'status']] * 2)
+        sql = captured.captured_queries[-1]['sql']
+        self.assertNotIn('"name"', sql)
+        self.assertNotIn('"email"', sql)
+
+        full = self.client.get(self.url, {'page_size': 2}).json()['notifications']
+        self.assertEqual(rows, [{key: row[key] for key in ('id', 'scheduled_date', 'status')} for row in full])
+
+        # The cursor still works, id and created_at are always fetched
+        cursor = response.json()['next']
+        response = self.client.get(self.url, {'fields': 'id', 'page_size': 2, 'cursor': cursor})
+        self.assertEqual(response.json()['notifications'], [{'id': n.pk} for n in self.notifications[2:4]])
+
+    def test_invalid_fields(self):
+        for value in ('', ',', 'id,password', 'created_at'):
+            response = self.client.get(self.url, {'fields': value})
+            self.assertEqual(response.status_code, 400, value)
+        self.assertIsNone(parse_fields(None))
+        self.assertEqual(parse_fields(' status, id ,id'), ('id', 'status'))
+
+    def test_detail_and_serializer(self):
+        notification = self.notifications[0]
+        response = self.client.get(reverse('notification-detail', args=[notification.pk]), {'fields': 'name,status'})
+        self.assertEqual(response.json()['notification'], {'name': notification.name, 'status': 'Pending'})
+        self.assertEqual(
+            self.client.get(reverse('notification-detail', args=[notification.pk]), {'fields': 'x'}).status_code, 400
+        )
+        self.assertEqual(dict(NotificationSerializer(notification, fields=('id', 'email')).data), {
+            'id': notification.pk, 'email': notification.email
+        })
+
+    def test_async_list_matches_sync_view(self):
+        params = {'fields': 'id,scheduled_date,status'}
+        with override_settings(ROOT_URLCONF='author.async_urls'):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.content, self.client.get(self.url, params).content)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1024, NOTIFICATION_CACHE_SINGLE_PROCESS=True)
+class CompressionMiddlewareTests(TestCase):
+    url = reverse('notification-list')
+
+    def setUp(self):
+        cache.clear()
+        self.notifications = make_notifications(30)
+
+    def test_large_response_is_compressed(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=1.0, identity;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get(
+            reverse('notification-detail', args=[self.notifications[0].pk]), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+    def test_streaming_response_is_compressed(self):
+        url = reverse('notification-export')
+        plain = b''.join(self.client.get(url, {'format': 'ndjson'}).streaming_content)
+        response = self.client.get(url, {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    def test_html_is_not_compressed(self):
+        # Pages with CSRF tokens and reflected input would be open to BREACH
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(
+            reverse('admin:author_notification_changelist'), {'q': 'user'}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(response.content), 1024)
+        self.assertNotIn('Content-Encoding', response)
+
+        csv = self.client.get(reverse('notification-export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', csv)
+
+    def test_choose_encoding(self):
+        preferred = next(iter(ENCODINGS))
+        self.assertEqual(choose_encoding('gzip'), 'gzip')
+        self.assertEqual(choose_encoding('deflate, *'), preferred)
+        self.assertIsNone(choose_encoding(''))
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding('gzip;q=0, deflate'))
+        self.assertIsNone(choose_encoding('*;q=0'))
+        self.assertIsNone(choose_encoding('gzip;q=abc'))
+
+    def test_compare_payloads(self):
+        results = compare_payloads(iterations=2, page_size=30)
+        self.assertEqual(results['all:gzip']['content_encoding'], 'gzip')
+        self.assertEqual(results['all:identity']['content_encoding'], 'identity')
+        self.assertLess(results['mobile:identity']['bytes'], results['all:identity']['bytes'])
+        self.assertLess(results['all:gzip']['bytes'], results['all:identity']['bytes'])
+
+
+class NotificationSlotOverlapTests(TestCase):
+    """
+    Slots are half-open intervals: a booking ending at 10:00 and one starting at 10:00
+    do not overlap.
+    """
+    url = reverse('notification-create')
+
+    def setUp(self):
+        # 10:00-10:30
+        self.booked = Notification.objects.create_pending(
+            name='Booked', email='booked@example.com', scheduled_date=datetime(2030, 1, 1, 10, tzinfo=dt_timezone.utc)
+        )
+
+    def create(self, time, **kwargs):
+        return self.client.post(self.url, {
+            'name': 'Aya',
+            'email': 'aya@example.com',
+            'scheduled_date': f'2030-01-01T{time}:00Z',
+            **kwargs
+        })
+
+    def test_boundaries(self):
+        cases = [
+            ('09:30', {}, 201),                         # ends when the booking starts
+            ('10:30', {}, 201),                         # starts when the booking ends
+            ('09:45', {}, 400),                         # runs into the booking
+            ('10:29', {'duration_minutes': 5}, 400),    # starts in its last minute
+            ('10:10', {'duration_minutes': 5}, 400),    # inside it
+            ('08:00', {'duration_minutes': 240}, 400),  # around it
+        ]
+        for start, kwargs, expected in cases:
+            with self.subTest(start=start, **kwargs):
+                response = self.create(start, **kwargs)
+                self.assertEqual(response.status_code, expected, response.content)
+                Notification.objects.exclude(pk=self.booked.pk).delete()
+
+    def test_longest_slot_is_found(self):
+        longest = Notification.objects.create_pending(
+            name='Long', email='long@example.com', duration_minutes=Notification.MAX_DURATION_MINUTES,
+            scheduled_date=datetime(2030, 1, 2, 0, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(self.create('23:59', duration_minutes=5).status_code, 400)
+        self.assertEqual(
+            list(Notification.objects.overlapping(
+                longest.scheduled_end - timedelta(minutes=1), longest.scheduled_end
+            )),
+            [longest]
+        )
+
+    def test_duration_limits(self):
+        self.assertEqual(self.create('12:00', duration_minutes=4).status_code, 400)
+        self.assertEqual(self.create('12:00', duration_minutes=Notification.MAX_DURATION_MINUTES + 1).status_code, 400)
+        self.assertEqual(self.create('12:00', duration_minutes=90).status_code, 201)
+        self.assertEqual(Notification.objects.get(name='Aya').active_end, datetime(2030, 1, 1, 13, 30, tzinfo=dt_timezone.utc))
+
+    def test_rejected_booking_frees_its_slot(self):
+        self.client.post(reverse('notification-decision', args=[self.booked.pk]), {'action': 'reject'})
+        self.assertIsNone(Notification.objects.get(pk=self.booked.pk).active_end)
+        self.assertEqual(self.create('10:15').status_code, 201)
+
+    def test_update_rechecks_overlaps(self):
+        other = Notification.objects.create_pending(
+            name='Other', email='other@example.com', scheduled_date=datetime(2030, 1, 1, 11, tzinfo=dt_timezone.utc)
+        )
+        url = reverse('notification-update', args=[other.pk])
+
+        def put(data):
+            return self.client.put(url, data, content_type='application/json')
+
+        self.assertEqual(put({'scheduled_date': '2030-01-01T10:20:00Z'}).status_code, 400)
+        # Growing into the booking at 10:00
+        self.assertEqual(put({'scheduled_date': '2030-01-01T09:00:00Z', 'duration_minutes': 61}).status_code, 400)
+        # Moving within its own slot only overlaps itself
+        response = put({'scheduled_date': '2030-01-01T11:10:00Z'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['notification']['duration_minutes'], 30)
+        # A longer slot keeps the start
+        self.assertEqual(put({'duration_minutes': 120}).status_code, 200)
+        other.refresh_from_db()
+        self.assertEqual(other.scheduled_date, datetime(2030, 1, 1, 11, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(other.active_end, datetime(2030, 1, 1, 13, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.create('12:00').status_code, 400)
+
+    def test_update_without_slot_change_skips_the_check(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.put(
+                reverse('notification-update', args=[self.booked.pk]), {'name': 'Renamed'},
+                content_type='application/json'
+            )
+        self.assertFalse(any('"active_end" >' in query['sql'] for query in captured))
+
+    def test_model_validation(self):
+        notification = Notification(
+            name='Aya', email='aya@example.com', scheduled_date=datetime(2030, 1, 1, 9, 45, tzinfo=dt_timezone.utc)
+        )
+        with self.assertRaises(ValidationError):
+            notification.full_clean()
+        notification.scheduled_date = datetime(2030, 1, 1, 9, 30, tzinfo=dt_timezone.utc)
+        notification.full_clean()
+
+    def test_benchmark_slot_checks(self):
+        seed_notifications(100)
+        results = benchmark_slot_checks(iterations=2)
+        self.assertTrue(results['overlap:taken']['taken'])
+        self.assertFalse(results['overlap:rejected']['taken'])
+        self.assertFalse(results['overlap:free']['taken'])
+        self.assertTrue(results['overlap:inside']['taken'])
+        self.assertFalse(results['equality:inside']['taken'])
+
+    def test_availability_counts_durations(self):
+        availability._occupied_cache.clear()
+        day = datetime(2030, 1, 1).date()
+        slots = availability.free_slots(
+            day, day, timedelta(minutes=15), dt_time(9), dt_time(12), now=datetime(2029, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        starts = [start.astimezone(dt_timezone.utc).strftime('%H:%M') for start, _ in slots]
+        self.assertNotIn('10:00', starts)
+        self.assertNotIn('10:15', starts)
+        self.assertIn('09:45', starts)
+        self.assertIn('10:30', starts)
@@ -0,0 +1,110 @@
+"""
+Status transitions of notifications.
+
+A decision is applied with a conditional ``UPDATE ... WHERE status = 'pending'``, so the
+check and the write are one statement: of two concurrent decisions exactly one wins,
+and deciding an already decided notification writes nothing.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import notifications_changed
+from .models import Notification
+
+# Admin actions and the status they move a notification to
+ACTIONS = {
+    'accept': 'accepted',
+    'reject': 'rejected',
+}
+
+# Statuses a notification may be moved to, by current status
+TRANSITIONS = {
+    'pending': ('accepted', 'rejected'),
+}
+
+
+class InvalidTransition(Exception):
+    """
+    Raised when a notification's current status does not allow the requested one.
+    """
+
+    def __init__(self, current_status, new_status):
+        self.current_status = current_status
+        self.new_status = new_status
+        super().__init__(f'Cannot move a notification from {current_status} to {new_status}.')
+
+
+def allowed_sources(new_status):
+    return [source for source, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def transition_fields(new_status):
+    """
+    The columns written by a move to ``new_status``. ``is_verified`` follows the status
+    (only accepted notifications are verified) and rejected ones release their slot.
+    """
+    fields = {
+        'status': new_status,
+        'is_verified': new_status == 'accepted',
+        'updated_at': timezone.now(),
+        'version': F('version') + 1,
+    }
+    if new_status not in Notification.ACTIVE_STATUSES:
+        # Release the slot, see Notification.save()
+        fields['active_slot'] = None
+        fields['active_end'] = None
+    return fields
+
+
+def apply_transition(queryset, new_status):
+    """
+    Moves the notifications of ``queryset`` that are allowed to reach ``new_status``
+    with a single UPDATE, and returns how many were moved.
+    """
+    updated = queryset.filter(status__in=allowed_sources(new_status)).update(**transition_fields(new_status))
+    if updated:
+        # update() does not send post_save
+        notifications_changed(using=queryset.db)
+    return updated
+
+
+def transition(pk, new_status):
+    """
+    Moves notification ``pk`` to ``new_status``. Costs one UPDATE when the transition is
+    allowed. Raises ``Notification.DoesNotExist`` or ``InvalidTransition`` otherwise.
+    """
+    if apply_transition(Notification.objects.filter(pk=pk), new_status):
+        return
+    current_status = Notification.objects.filter(pk=pk).values_list('status', flat=True).first()
+    if current_status is None:
+        raise Notification.DoesNotExist
+    raise InvalidTransition(current_status, new_status)
+
+
+def transition_many(ids, new_status):
+    """
+    Moves every notification of ``ids`` that is allowed to reach ``new_status``, with one
+    locking SELECT and one UPDATE whatever the number of ids. Returns one result per id,
+    in the order given: ``{'id', 'result'}`` where result is ``new_status``,
+    ``'invalid_transition'`` (with the current ``status``) or ``'not_found'``.
+    """
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        current = dict(
+            Notification.objects.filter(pk__in=ids).select_for_update().values_list('id', 'status')
+        )
+        sources = allowed_sources(new_status)
+        movable = [pk for pk, status in current.items() if status in sources]
+        if movable:
+            apply_transition(Notification.objects.filter(pk__in=movable), new_status)
+
+    results = []
+    for pk in ids:
+        if pk not in current:
+            results.append({'id': pk, 'result': 'not_found'})
+        elif current[pk] in sources:
+            results.append({'id': pk, 'result': new_status})
+        else:
+            results.append({'id': pk, 'result': 'invalid_transition', 'status': current[pk]})
+    return results
@@ -1,9 +1,18 @@
 from django.urls import path
+from .export import NotificationExportView
 from .views import *
 
 urlpatterns = [
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
     path('notifications/create/', NotificationCreateView.as_view(), name='notification-create'),
+    path('notifications/bulk-create/', NotificationBulkCreateView.as_view(), name='notification-bulk-create'),
+    path('notifications/availability/', NotificationAvailabilityView.as_view(), name='notification-availability'),
+    path('notifications/calendar/', NotificationCalendarView.as_view(), name='notification-calendar'),
+    path('notifications/decision/', NotificationBatchDecisionView.as_view(), name='notification-batch-decision'),
+    path('notifications/export/', NotificationExportView.as_view(), name='notification-export'),
+    path('notifications/archive/', NotificationArchiveListView.as_view(), name='notification-archive-list'),
+    path('notifications/<int:pk>/', NotificationDetailView.as_view(), name='notification-detail'),
     path('notifications/<int:pk>/update/', NotificationUpdateView.as_view(), name='notification-update'),
     path('notifications/<int:pk>/delete/', NotificationDeleteView.as_view(), name='notification-delete'),
-]
\ No newline at end of file
+    path('notifications/<int:pk>/decision/', NotificationAdminDecisionView.as_view(), name='notification-decision'),
+]
@@ -3,14 +3,31 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError
+import operator
 import uuid
 import secrets
+from bisect import insort
 from datetime import timedelta
-from .models import Notification
-from .serializers import NotificationSerializer
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from functools import partial, reduce
+from .cache import get_cached_list, list_etag, list_last_modified, notifications_changed, set_cached_list
+from .idempotency import idempotent
+from .models import Notification, NotificationArchive, SlotBusy, lock_slot_days, overlap_condition, run_booking
+from .pagination import InvalidCursor, NotificationCursorPagination
+from .availability import free_slots, overlaps
+from .search import InvalidSearch, apply_search
+from .summary import calendar
+from .serializers import (
+    NOTIFICATION_COLUMNS, AvailabilityQuerySerializer, BatchDecisionSerializer, CalendarQuerySerializer,
+    InvalidFields, NotificationSerializer,
+    format_datetime, notification_columns, parse_fields, serialize_notification_rows,
+)
+from .transitions import ACTIONS, InvalidTransition, transition, transition_many
+from .docs import openapi, swagger_auto_schema
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views.decorators.http import condition
 import logging
 
 
@@ -18,13 +35,34 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+IDEMPOTENCY_KEY_PARAMETER = openapi.Parameter(
+    'Idempotency-Key',
+    openapi.IN_HEADER,
+    description="Unique key for this request. A retry with the same key returns the original response.",
+    type=openapi.TYPE_STRING,
+    required=False
+)
+
+FIELDS_PARAMETER = openapi.Parameter(
+    'fields',
+    openapi.IN_QUERY,
+    description="Comma separated fields to return, e.g. id,scheduled_date,status (default: all)",
+    type=openapi.TYPE_STRING,
+    required=False
+)
+
+
 class NotificationListView(APIView):
     """
     Handles GET requests for retrieving notifications.
     """
 
+    @method_decorator(condition(
+        etag_func=lambda request: list_etag(request.GET),
+        last_modified_func=lambda request: list_last_modified(request.GET)
+    ))
     @swagger_auto_schema(
-        operation_description="Get notifications with optional filtering",
+        operation_description="Get notifications with optional filtering, paginated by cursor",
         manual_parameters=[
             openapi.Parameter(
                 'verified',
@@ -32,23 +70,327 @@ class NotificationListView(APIView):
                 description="Filter by verification status (true/false)",
                 type=openapi.TYPE_BOOLEAN,
                 required=False
-            )
+            ),
+            openapi.Parameter(
+                'prefix',
+                openapi.IN_QUERY,
+                description="Only notifications whose name or email starts with this text (any case)",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'search',
+                openapi.IN_QUERY,
+                description="Only notifications where every word starts a word of the name or email",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from the 'next' or 'previous' field of a previous page",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of notifications per page",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+            openapi.Parameter(
+                'include_count',
+                openapi.IN_QUERY,
+                description="Also return the total number of matching notifications (true/false)",
+                type=openapi.TYPE_BOOLEAN,
+                required=False
+            ),
+            FIELDS_PARAMETER
         ],
         responses={200: NotificationSerializer(many=True)}
     )
     def get(self, request):
+        # The key embeds the notifications version, so it is computed before reading
+        # any rows: a write that lands meanwhile moves readers to a new key
+        cache_key, data = get_cached_list(request.query_params)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
         is_verified = request.query_params.get('verified', None)
         notifications = Notification.objects.all()
 
         if is_verified is not None:
             is_verified = is_verified.lower() == 'true'
-            notifications = notifications.filter(is_verified=is_verified)
+            notifications = notifications.verified(is_verified)
 
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response({
+        try:
+            notifications = apply_search(notifications, request.query_params)
+        except InvalidSearch:
+            return Response(
+                {'message': 'Invalid search query'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except InvalidFields:
+            return Response(
+                {'message': 'Invalid fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            paginator = NotificationCursorPagination(request)
+        except InvalidCursor:
+            return Response(
+                {'message': 'Invalid cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Fetch plain column values, only the ones the selected fields need, and build
+        # the output directly, see serialize_notification_rows
+        rows = notifications.values(*notification_columns(fields))
+        page, next_cursor, previous_cursor = paginator.paginate(paginator.get_window(rows))
+        data = {
             'message': 'Notifications retrieved successfully',
-            'count': notifications.count(),
-            'notifications': serializer.data
+            'next': next_cursor,
+            'previous': previous_cursor,
+            'notifications': serialize_notification_rows(page, fields)
+        }
+
+        # Counting is a full scan of the filtered rows, so only do it on request
+        if request.query_params.get('include_count', '').lower() == 'true':
+            data['count'] = notifications.count()
+
+        set_cached_list(cache_key, data)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class NotificationArchiveListView(APIView):
+    """
+    Handles GET requests for retrieving archived notifications.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Get notifications moved to the archive by the retention job, paginated by cursor",
+        manual_parameters=[
+            openapi.Parameter(
+                'email',
+                openapi.IN_QUERY,
+                description="Only the notifications of this email address",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from the 'next' or 'previous' field of a previous page",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of notifications per page",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            )
+        ],
+        responses={200: NotificationSerializer(many=True)}
+    )
+    def get(self, request):
+        notifications = NotificationArchive.objects.all()
+        email = request.query_params.get('email')
+        if email:
+            notifications = notifications.filter(email=email)
+
+        try:
+            paginator = NotificationCursorPagination(request)
+        except InvalidCursor:
+            return Response(
+                {'message': 'Invalid cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = notifications.values(*NOTIFICATION_COLUMNS)
+        page, next_cursor, previous_cursor = paginator.paginate(paginator.get_window(rows))
+        return Response({
+            'message': 'Archived notifications retrieved successfully',
+            'next': next_cursor,
+            'previous': previous_cursor,
+            'notifications': serialize_notification_rows(page)
+        }, status=status.HTTP_200_OK)
+
+
+class NotificationAvailabilityView(APIView):
+    """
+    Handles GET requests for listing free time slots.
+    """
+
+    @swagger_auto_schema(
+        operation_description="List the free time slots between two dates within working hours",
+        query_serializer=AvailabilityQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Free time slots",
+                examples={
+                    "application/json": {
+                        "message": "Available time slots retrieved successfully",
+                        "slot_minutes": 30,
+                        "slots": [
+                            {"start": "2030-01-01T09:00:00Z", "end": "2030-01-01T09:30:00Z"}
+                        ]
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request):
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        slots = free_slots(
+            params['start'],
+            params['end'],
+            timedelta(minutes=params['slot_minutes']),
+            params['work_start'],
+            params['work_end']
+        )
+        tz = timezone.get_current_timezone()
+        return Response({
+            'message': 'Available time slots retrieved successfully',
+            'slot_minutes': params['slot_minutes'],
+            'slots': [
+                {'start': format_datetime(start, tz), 'end': format_datetime(end, tz)}
+                for start, end in slots
+            ]
+        }, status=status.HTTP_200_OK)
+
+
+class NotificationCalendarView(APIView):
+    """
+    Handles GET requests for the number of notifications per day and status.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Count the notifications of every day between two dates (UTC) by status",
+        query_serializer=CalendarQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Counts per day",
+                examples={
+                    "application/json": {
+                        "message": "Calendar retrieved successfully",
+                        "days": [
+                            {"date": "2030-01-01", "pending": 3, "accepted": 1, "rejected": 0, "total": 4}
+                        ]
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request):
+        query = CalendarQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': 'Calendar retrieved successfully',
+            'days': calendar(query.validated_data['start'], query.validated_data['end'])
+        }, status=status.HTTP_200_OK)
+
+
+def notification_state(request, pk):
+    """
+    Returns ``(updated_at, version)`` of a notification (or None if it does not exist)
+    with one small query, remembered on the request for the ETag and Last-Modified checks.
+    """
+    if not hasattr(request, '_notification_state'):
+        request._notification_state = (
+            Notification.objects.filter(pk=pk).values_list('updated_at', 'version').first()
+        )
+    return request._notification_state
+
+
+def notification_validator(request, pk):
+    state = notification_state(request, pk)
+    return state[0] if state else None
+
+
+def version_etag(version):
+    return f'"{version}"'
+
+
+def notification_etag(request, pk=None):
+    state = notification_state(request, pk)
+    return version_etag(state[1]) if state else None
+
+
+def if_match_version(request):
+    """
+    Returns the version an update is conditional on, taken from the ``If-Match`` header
+    (an ETag of the detail endpoint). None means unconditional, also for ``If-Match: *``.
+    The weak form that compressed responses carry (see CompressionMiddleware) is taken
+    too, the ETag names the version either way. Raises ValueError for a header that is
+    not one of our ETags.
+    """
+    header = request.headers.get('If-Match')
+    if header is None or header.strip() == '*':
+        return None
+    etags = parse_etags(header)
+    if len(etags) != 1:
+        raise ValueError(header)
+    etag = etags[0].removeprefix('W/')
+    if not etag.startswith('"'):
+        raise ValueError(header)
+    return int(etag.strip('"'))
+
+
+class NotificationDetailView(APIView):
+    """
+    Handles GET requests for retrieving a single notification.
+    """
+
+    @method_decorator(condition(
+        etag_func=notification_etag,
+        last_modified_func=notification_validator
+    ))
+    @swagger_auto_schema(
+        operation_description="Get a single notification. Supports If-None-Match and If-Modified-Since.",
+        manual_parameters=[FIELDS_PARAMETER],
+        responses={
+            200: NotificationSerializer,
+            304: openapi.Response(description="Notification not modified"),
+            404: openapi.Response(description="Notification not found")
+        }
+    )
+    def get(self, request, pk=None):
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except InvalidFields:
+            return Response(
+                {'message': 'Invalid fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        notifications = Notification.objects.all()
+        if fields is not None:
+            notifications = notifications.only(*notification_columns(fields))
+        try:
+            notification = notifications.get(pk=pk)
+        except Notification.DoesNotExist:
+            return Response(
+                {'message': 'Notification not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = NotificationSerializer(notification, fields=fields)
+        return Response({
+            'message': 'Notification retrieved successfully',
+            'notification': serializer.data
         }, status=status.HTTP_200_OK)
 
 
@@ -59,7 +401,9 @@ class NotificationCreateView(APIView):
 
     @swagger_auto_schema(
         request_body=NotificationSerializer,
-        operation_description="Create a new notification with time slot validation",
+        operation_description="Create a new notification with time slot validation. "
+                              "Send an Idempotency-Key header to make retries safe.",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: openapi.Response(
                 description="Notification created successfully",
@@ -68,29 +412,169 @@ class NotificationCreateView(APIView):
                         "message": "Notification submitted successfully. Please wait for admin validation."
                     }
                 }
-            )
+            ),
+            409: openapi.Response(description="Other bookings of this time slot are in progress, retry")
         }
     )
+    @idempotent
     def post(self, request):
         serializer = NotificationSerializer(data=request.data)
         if serializer.is_valid():
-            # Validate if the time slot is free
-            scheduled_date = serializer.validated_data['scheduled_date']
-            # Check if any accepted or pending notifications exist for the scheduled date
-            if Notification.objects.filter(scheduled_date=scheduled_date, status__in=['accepted', 'pending']).exists():
+            # The overlap check and the insert share a transaction under the locks of
+            # the slot's days, see create_pending
+            try:
+                Notification.objects.create_pending(**serializer.validated_data)
+            except SlotBusy:
+                return Response(
+                    {"message": "Other bookings of this time slot are in progress. Please retry."},
+                    status=status.HTTP_409_CONFLICT
+                )
+            except IntegrityError:
                 return Response(
                     {"message": "This time slot is already taken or pending. Please choose a different time."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            # Save notification as pending
-            serializer.save(status='pending')
+
             return Response(
                 {"message": "Notification submitted successfully. Please wait for admin validation."},
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class NotificationBulkCreateView(APIView):
+    """
+    Handles POST requests for creating a batch of notifications at once.
+    """
+    # Attempts made when the insert still hits a taken slot (a write that doesn't take
+    # the day locks, such as an admin edit) or the booking kept deadlocking
+    max_attempts = 3
+    # Ranges looked up per conflict query, SQLite limits the depth of an OR chain
+    lookup_ranges = 100
+
+    @swagger_auto_schema(
+        request_body=NotificationSerializer(many=True),
+        operation_description="Create many notifications in one request, skipping taken time slots",
+        responses={
+            201: openapi.Response(
+                description="Batch processed, at least one notification created",
+                examples={
+                    "application/json": {
+                        "message": "Batch processed.",
+                        "created": 1,
+                        "conflicts": 1,
+                        "results": [
+                            {"index": 0, "result": "created", "id": 12},
+                            {"index": 1, "result": "conflict", "id": None}
+                        ]
+                    }
+                }
+            ),
+            409: openapi.Response(
+                description="Every time slot in the batch was already taken, or the slots kept "
+                            "changing under concurrent bookings"
+            )
+        }
+    )
+    def post(self, request):
+        max_size = getattr(settings, 'NOTIFICATION_BULK_CREATE_MAX', 1000)
+        if isinstance(request.data, list) and len(request.data) > max_size:
+            return Response(
+                {'message': f'A batch may contain at most {max_size} notifications.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = NotificationSerializer(data=request.data, many=True, allow_empty=False)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        for attempt in range(self.max_attempts):
+            try:
+                results = run_booking(partial(self.create_batch, serializer.validated_data))
+                break
+            except IntegrityError:
+                # Lost a race for one of the slots, or kept deadlocking with other
+                # bookings, look the conflicts up again
+                continue
+        else:
+            return Response(
+                {'message': 'The time slots kept changing while the batch was created. Please retry.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        created = sum(1 for result in results if result['result'] == 'created')
+        return Response({
+            'message': 'Batch processed.',
+            'created': created,
+            'conflicts': len(results) - created,
+            'results': results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_409_CONFLICT)
+
+    def booked_slots(self, notifications):
+        """
+        The ``(start, end)`` slots of the bookings overlapping the batch, sorted by start.
+        Overlapping and touching slots of the batch are merged into one range first, so
+        a batch of consecutive slots is a single range query. The days of the ranges are
+        locked first, so no concurrent booking can take one of the slots until the batch
+        commits, see lock_slot_days.
+        """
+        ranges = []
+        for start, end in sorted((n.scheduled_date, n.scheduled_end) for n in notifications):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+
+        lock_slot_days(ranges)
+        slots = []
+        for offset in range(0, len(ranges), self.lookup_ranges):
+            condition = reduce(operator.or_, (
+                overlap_condition(start, end) for start, end in ranges[offset:offset + self.lookup_ranges]
+            ))
+            slots += Notification.objects.filter(condition).values_list('active_slot', 'active_end')
+        return sorted(slots)
+
+    def create_batch(self, items):
+        """
+        Finds the bookings overlapping the batch (see booked_slots), then inserts the
+        items that overlap none of them with bulk_create. Later items lose against
+        earlier items of the same batch.
+        """
+        notifications = [Notification(**item, status='pending') for item in items]
+        taken = self.booked_slots(notifications)
+
+        reserved, results = [], []
+        for index, notification in enumerate(notifications):
+            start, end = notification.scheduled_date, notification.scheduled_end
+            if overlaps(taken, start, end):
+                results.append({'index': index, 'result': 'conflict', 'id': None})
+                continue
+            insort(taken, (start, end), key=operator.itemgetter(0))
+            # bulk_create skips Notification.save(), so the slot is reserved explicitly
+            notification.active_slot, notification.active_end = start, end
+            reserved.append(notification)
+            results.append({'index': index, 'result': 'created', 'id': None})
+
+        Notification.objects.bulk_create(reserved)
+        # bulk_create does not send post_save
+        notifications_changed()
+        if reserved and reserved[0].pk is None:
+            # MySQL cannot return the primary keys of a bulk insert, look them up by
+            # their slot, which is unique
+            ids = dict(
+                Notification.objects.filter(active_slot__in=[n.active_slot for n in reserved])
+                .values_list('active_slot', 'id')
+            )
+            for notification in reserved:
+                notification.pk = ids[notification.active_slot]
+
+        # Backends that return primary keys from bulk inserts fill in the ids
+        created = iter(reserved)
+        for result in results:
+            if result['result'] == 'created':
+                result['id'] = next(created).pk
+        return results
+
+
 class NotificationUpdateView(APIView):
     """
     Handles PUT requests for updating notifications.
@@ -98,7 +582,17 @@ class NotificationUpdateView(APIView):
 
     @swagger_auto_schema(
         request_body=NotificationSerializer,
-        operation_description="Update an existing notification",
+        operation_description="Update an existing notification. Send the ETag of the notification as "
+                              "If-Match to only update it if nobody changed it in the meantime.",
+        manual_parameters=[
+            openapi.Parameter(
+                'If-Match',
+                openapi.IN_HEADER,
+                description="ETag (version) of the notification this update is based on",
+                type=openapi.TYPE_STRING,
+                required=False
+            )
+        ],
         responses={
             200: openapi.Response(
                 description="Notification updated successfully",
@@ -107,33 +601,72 @@ class NotificationUpdateView(APIView):
                         "message": "Notification updated successfully"
                     }
                 }
+            ),
+            409: openapi.Response(
+                description="The notification changed since the version in If-Match, or other "
+                            "bookings of its new time slot are in progress (retry)",
+                examples={
+                    "application/json": {
+                        "message": "The notification was changed by someone else.",
+                        "version": 3
+                    }
+                }
             )
         }
     )
     def put(self, request, pk=None):
         try:
-            notification = Notification.objects.get(pk=pk)
-
-            if notification.is_verified:
-                return Response(
-                    {'message': 'Cannot update a verified notification'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            expected_version = if_match_version(request)
+        except ValueError:
+            return Response(
+                {'message': 'Invalid If-Match header'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            serializer = NotificationSerializer(notification, data=request.data, partial=True)
-            if serializer.is_valid():
-                updated_notification = serializer.save()
-                return Response({
-                    'message': 'Notification updated successfully',
-                    'notification': serializer.data
-                }, status=status.HTTP_200_OK)
+        serializer = NotificationSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        except Notification.DoesNotExist:
+        # One UPDATE checks the verification state and version and writes the change,
+        # so nothing can verify or edit the row between the check and the write
+        try:
+            updated = Notification.objects.update_unverified(
+                pk, serializer.validated_data, version=expected_version
+            )
+        except SlotBusy:
+            return Response(
+                {"message": "Other bookings of this time slot are in progress. Please retry."},
+                status=status.HTTP_409_CONFLICT
+            )
+        except IntegrityError:
+            return Response(
+                {"message": "This time slot is already taken or pending. Please choose a different time."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The row for the response, and when nothing was updated, the reason why
+        row = Notification.objects.filter(pk=pk).values(*NOTIFICATION_COLUMNS, 'version').first()
+        if row is None:
             return Response(
                 {'message': 'Notification not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if not updated and row['is_verified']:
+            return Response(
+                {'message': 'Cannot update a verified notification'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not updated:
+            return Response(
+                {'message': 'The notification was changed by someone else.', 'version': row['version']},
+                status=status.HTTP_409_CONFLICT,
+                headers={'ETag': version_etag(row['version'])}
+            )
+
+        return Response({
+            'message': 'Notification updated successfully',
+            'notification': serialize_notification_rows([row])[0]
+        }, status=status.HTTP_200_OK, headers={'ETag': version_etag(row['version'])})
 
 
 class NotificationDeleteView(APIView):
@@ -166,40 +699,86 @@ class NotificationAdminDecisionView(APIView):
     This view will update the status of the notification, but email sending is handled in the Django Admin.
     """
 
+    @swagger_auto_schema(
+        operation_description="Accept or reject a pending notification",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={
+            200: openapi.Response(description="Notification accepted or rejected"),
+            404: openapi.Response(description="Notification not found"),
+            409: openapi.Response(description="The notification is not pending any more")
+        }
+    )
+    @idempotent
     def post(self, request, pk=None):
+        # Ensure the admin action is valid
+        action = str(request.data.get('action', '')).lower()
+        if action not in ACTIONS:
+            return Response(
+                {'message': "Invalid action. Please use 'accept' or 'reject'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        new_status = ACTIONS[action]
         try:
-            # Retrieve the notification by its primary key
-            notification = Notification.objects.get(pk=pk)
+            transition(pk, new_status)
         except Notification.DoesNotExist:
             return Response(
                 {'message': 'Notification not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        # Ensure the admin action is valid
-        action = request.data.get('action', '').lower()
-        if action not in ['accept', 'reject']:
+        except InvalidTransition as exc:
             return Response(
-                {'message': "Invalid action. Please use 'accept' or 'reject'."},
-                status=status.HTTP_400_BAD_REQUEST
+                {'message': f'Cannot {action} a notification that is already {exc.current_status}.',
+                 'status': exc.current_status},
+                status=status.HTTP_409_CONFLICT
             )
 
-        # If the action is 'accept', set the notification status to 'accepted'
-        if action == 'accept':
-            notification.status = 'accepted'
-            notification.save()
+        return Response(
+            {'message': f'Notification {new_status} successfully.'},
+            status=status.HTTP_200_OK
+        )
 
-            return Response(
-                {'message': 'Notification accepted successfully.'},
-                status=status.HTTP_200_OK
-            )
 
-        # If the action is 'reject', set the notification status to 'rejected'
-        if action == 'reject':
-            notification.status = 'rejected'
-            notification.save()
+class NotificationBatchDecisionView(APIView):
+    """
+    Allows the admin to accept or reject many notification requests at once.
+    """
 
-            return Response(
-                {'message': 'Notification rejected successfully.'},
-                status=status.HTTP_200_OK
-            )
\ No newline at end of file
+    @swagger_auto_schema(
+        request_body=BatchDecisionSerializer,
+        operation_description="Accept or reject many pending notifications with one UPDATE",
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
+        responses={
+            200: openapi.Response(
+                description="Batch processed",
+                examples={
+                    "application/json": {
+                        "message": "Batch processed.",
+                        "updated": 1,
+                        "invalid": 1,
+                        "not_found": 1,
+                        "results": [
+                            {"id": 12, "result": "accepted"},
+                            {"id": 13, "result": "invalid_transition", "status": "rejected"},
+                            {"id": 14, "result": "not_found"}
+                        ]
+                    }
+                }
+            )
+        }
+    )
+    @idempotent
+    def post(self, request):
+        serializer = BatchDecisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        new_status = ACTIONS[serializer.validated_data['action']]
+        results = transition_many(serializer.validated_data['ids'], new_status)
+        return Response({
+            'message': 'Batch processed.',
+            'updated': sum(1 for result in results if result['result'] == new_status),
+            'invalid': sum(1 for result in results if result['result'] == 'invalid_transition'),
+            'not_found': sum(1 for result in results if result['result'] == 'not_found'),
+            'results': results
+        }, status=status.HTTP_200_OK)
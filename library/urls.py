@@ -14,21 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path,include
-from rest_framework.schemas import get_schema_view
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view as swagger_get_schema_view
+from author.docs import live_schema_urls, schema_file_view
+from author.metrics import metrics_view
 
-schema_view = swagger_get_schema_view(
-        openapi.Info(
-        title="Your API",
-        default_version='v1',
-        description="API documentation",
-),    public=True)
-urlpatterns = [
-    path('swagger/schema', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+if settings.API_DOCS_LIVE:
+    # Development: drf_yasg builds the schema (and Swagger UI) on every request
+    docs_urls = live_schema_urls()
+else:
+    # Production: the schema precomputed by `manage.py generate_openapi_schema`
+    docs_urls = [path('swagger/schema.json', schema_file_view, name='schema-json')]
+
+urlpatterns = docs_urls + [
     path('admin/', admin.site.urls),
-    path('',include('author.urls'))
+    path('metrics', metrics_view, name='metrics'),
+    # NOTIFICATION_API_ASYNC serves the async views when running under ASGI
+    path('',include('author.async_urls' if settings.NOTIFICATION_API_ASYNC else 'author.urls'))
 
 ]